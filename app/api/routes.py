@@ -1,13 +1,23 @@
-from fastapi import APIRouter, HTTPException, Query, Path, Depends, Request
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Path, Depends, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from functools import partial
+import asyncio
 import logging
+import msgspec
+import orjson
+from cachetools import TTLCache
 
 from app.models.queue import (
-    MessageRequest, MessageResponse, MessagesResponse, 
+    MessageRequest, MessageRequestStruct, MessageResponse, MessagesResponse, 
     QueueInfo, HealthResponse, ErrorResponse, QueueMessage,
-    CheckExistenceRequest, CheckExistenceResponse
+    CheckExistenceRequest, CheckExistenceResponse,
+    BatchMessageRequest, BatchDeleteRequest, BatchItemResult, BatchResponse
 )
-from app.services.queue_service import get_queue_service
+from app.services.queue_service import QueueService
+from app.core.storage import StorageError
+from app.api.serialization import ORJSONRoute, ORJSONResponse
 from app.core.security import (
     require_queue_permission,
     QueuePermission,
@@ -22,67 +32,166 @@ logger = logging.getLogger(__name__)
 # Constants
 QUEUE_NAME_DESC = "Name of the queue"
 MESSAGE_NOT_FOUND = "Message not found"
+STORAGE_UNAVAILABLE = "Storage backend unavailable"
+BATCH_CONCURRENCY = 10  # max storage operations in flight per batch request
 
-router = APIRouter()
+# Shared permission dependencies - one callable per permission so FastAPI can reuse them across routes
+_REQ_READ = require_queue_permission(QueuePermission.READ)
+_REQ_WRITE = require_queue_permission(QueuePermission.WRITE)
+_REQ_DELETE = require_queue_permission(QueuePermission.DELETE)
+_REQ_MANAGE = require_queue_permission(QueuePermission.MANAGE)
 
-@router.post("/queues/{queue_name}/messages", response_model=MessageResponse)
+# add_message decodes its body with msgspec; the Pydantic model only documents the schema
+_message_request_decoder = msgspec.json.Decoder(MessageRequestStruct)
+_MESSAGE_REQUEST_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": MessageRequest.model_json_schema()}}
+    }
+}
+
+# Fixed success payloads, serialized once; handlers wrap them in a fresh Response per request
+_DELETED_BODY = orjson.dumps({"status": "success", "message": "Message deleted"})
+_UPDATED_BODY = orjson.dumps({"status": "success", "message": "Message updated"})
+_CLEARED_BODY = orjson.dumps({"status": "success", "message": "Queue cleared"})
+
+# Short-lived response caches keyed by APIKeyConfig (one instance per key); the TTL bounds staleness, so writes don't invalidate them
+_LIST_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=2.0)
+_LIST_LOCK = asyncio.Lock()
+_AUTH_ME_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=60.0)  # reflects static key config only
+
+# Per-queue routes share the queue prefix; main.py mounts them ahead of the rest since they carry the traffic
+queue_router = APIRouter(prefix="/queues/{queue_name}", route_class=ORJSONRoute)
+auth_router = APIRouter(prefix="/auth", route_class=ORJSONRoute)
+router = APIRouter(route_class=ORJSONRoute)
+
+
+async def get_service(request: Request) -> QueueService:
+    """Dependency returning the queue service bound to the application at startup"""
+    # async so FastAPI calls it inline instead of dispatching to the threadpool
+    return request.app.state.queue_service
+
+
+async def _run_batch(operations: List[Tuple[Optional[str], Callable[[], Awaitable[Any]]]]) -> BatchResponse:
+    """Run batch operations concurrently with bounded parallelism, collecting per-item results
+
+    A missing message or a storage failure becomes that item's error, with a fixed
+    message; anything else propagates to the global exception handlers.
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def _run_one(item_id: Optional[str], operation: Callable[[], Awaitable[Any]]) -> BatchItemResult:
+        async with semaphore:
+            try:
+                result = await operation()
+            except LookupError:
+                return BatchItemResult(id=item_id, status="error", error=MESSAGE_NOT_FOUND)
+            except StorageError as e:
+                logger.error("Storage error on batch item %s: %s", item_id, e)
+                return BatchItemResult(id=item_id, status="error", error=STORAGE_UNAVAILABLE)
+            return BatchItemResult(id=item_id, status="success", result=result)
+
+    results = await asyncio.gather(*(_run_one(item_id, operation) for item_id, operation in operations))
+    return _batch_response(results)
+
+def _batch_response(results: List[BatchItemResult]) -> BatchResponse:
+    """Summarize per-item batch results"""
+    failed = sum(1 for result in results if result.status == "error")
+    return BatchResponse(
+        succeeded=len(results) - failed,
+        failed=failed,
+        total=len(results),
+        results=results
+    )
+
+@queue_router.post("/messages", response_model=MessageResponse, openapi_extra=_MESSAGE_REQUEST_OPENAPI)
 async def add_message(
+    request: Request,
     queue_name: str = Path(..., description=QUEUE_NAME_DESC),
-    message_request: MessageRequest = ...,
-    queue_access: QueueAccess = Depends(require_queue_permission(QueuePermission.WRITE))
+    queue_access: QueueAccess = Depends(_REQ_WRITE),
+    service: QueueService = Depends(get_service)
 ):
     """Add a message to the specified queue - requires WRITE permission"""
-    logger.info(f"POST /queues/{queue_name}/messages - API Key: {queue_access.api_key_config.key[:20]}... - Queue: {queue_name}")
-    logger.info(f"Message request received: {message_request.model_dump()}")
+    logger.info("POST /queues/%s/messages - API Key: %s - Queue: %s", queue_name, queue_access.api_key_config.description, queue_name)
     try:
-        service = get_queue_service()
-        
-        # Convert string messages to dict format for storage
-        message_body = message_request.message_body
-        if isinstance(message_body, str):
-            message_body = {"content": message_body}
-        
-        message_id = await service.add_message(
-            queue_name=queue_name,
-            message_body=message_body,
-            message_id=message_request.id
-        )
-        
-        return MessageResponse(
-            id=message_id,
-            status="success"
-        )
-    except Exception as e:
-        logger.error(f"Error adding message to queue {queue_name}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/queues/{queue_name}/messages", response_model=MessagesResponse)
+        message_request = _message_request_decoder.decode(await request.body())
+    except msgspec.DecodeError as e:
+        raise RequestValidationError([{"type": "value_error", "loc": ("body",), "msg": str(e), "input": None}])
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Message request received: %s", msgspec.structs.asdict(message_request))
+    message_id = await service.add_message(
+        queue_name=queue_name,
+        message_body=message_request.message_body,
+        message_id=message_request.id
+    )
+    
+    # MessageResponse documents the shape; building the bytes directly skips model construction
+    return Response(
+        content=orjson.dumps({"id": message_id, "status": "success", "receipt_handle": None}),
+        media_type="application/json"
+    )
+
+@queue_router.post("/messages/batch", response_model=BatchResponse)
+async def add_messages_batch(
+    queue_name: str = Path(..., description=QUEUE_NAME_DESC),
+    batch_request: BatchMessageRequest = ...,
+    queue_access: QueueAccess = Depends(_REQ_WRITE),
+    service: QueueService = Depends(get_service)
+):
+    """Add up to 1000 messages in one request - requires WRITE permission"""
+    operations = batch_request.operations
+    # One storage call for the whole batch, so it succeeds or fails as a unit; a failure
+    # propagates to the global handlers (StorageError -> 503) rather than per-item rows
+    message_ids = await service.add_messages(
+        queue_name,
+        [(message_request.message_body, message_request.id) for message_request in operations]
+    )
+    results = [
+        BatchItemResult(id=message_request.id, status="success", result=message_id)
+        for message_request, message_id in zip(operations, message_ids)
+    ]
+    return _batch_response(results)
+
+@queue_router.get("/messages", response_model=MessagesResponse)
 async def get_messages(
     queue_name: str = Path(..., description=QUEUE_NAME_DESC),
     limit: int = Query(10, ge=1, le=100, description="Maximum number of messages to return"),
     offset: int = Query(0, ge=0, description="Number of messages to skip"),
-    queue_access: QueueAccess = Depends(require_queue_permission(QueuePermission.READ))
+    queue_access: QueueAccess = Depends(_REQ_READ),
+    service: QueueService = Depends(get_service)
 ):
     """Get messages from the specified queue with pagination - requires READ permission"""
-    try:
-        service = get_queue_service()
-        messages, total = await service.get_messages(queue_name, limit=limit, offset=offset)
-        
-        response = MessagesResponse(
-            messages=messages,
-            count=len(messages),
-            total=total,
-            offset=offset,
-            limit=limit,
-            has_more=(offset + len(messages)) < total
-        )
-        logger.debug("Messages response payload: %s", response.model_dump())
-        return response
-    except Exception as e:
-        logger.error(f"Error getting messages from queue {queue_name}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.post("/queues/{queue_name}/messages/receive", response_model=MessagesResponse)
+    messages, total = await service.get_messages(queue_name, limit=limit, offset=offset)
+    
+    # Shaped like MessagesResponse, serialized without building the models
+    payload = {
+        "messages": messages,
+        "count": len(messages),
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "has_more": (offset + len(messages)) < total
+    }
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Messages response payload: %s", payload)
+    return Response(content=orjson.dumps(payload), media_type="application/json")
+
+@queue_router.get("/messages/stream", response_class=StreamingResponse)
+async def stream_messages(
+    queue_name: str = Path(..., description=QUEUE_NAME_DESC),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of messages to return"),
+    offset: int = Query(0, ge=0, description="Number of messages to skip"),
+    queue_access: QueueAccess = Depends(_REQ_READ),
+    service: QueueService = Depends(get_service)
+):
+    """Stream messages from the queue as newline-delimited JSON - requires READ permission"""
+    async def _ndjson():
+        async for message in service.iter_messages(queue_name, limit=limit, offset=offset):
+            yield orjson.dumps(message) + b"\n"
+    
+    return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
+
+@queue_router.post("/messages/receive", response_model=MessagesResponse)
 async def receive_messages(
     queue_name: str = Path(..., description=QUEUE_NAME_DESC),
     max_messages: int = Query(10, ge=1, le=100, description="Maximum number of messages to return"),
@@ -90,278 +199,256 @@ async def receive_messages(
     consumer_id: Optional[str] = Query(None, min_length=1, description="Identifier for the consumer requesting messages"),
     delete_after_receive: bool = Query(False, description="When true, remove messages from the queue immediately after receipt"),
     only_new: bool = Query(False, description="When true, return only messages that have never been delivered"),
-    queue_access: QueueAccess = Depends(require_queue_permission(QueuePermission.READ))
+    queue_access: QueueAccess = Depends(_REQ_READ),
+    service: QueueService = Depends(get_service)
 ):
     """Receive messages from the queue (SQS-style with visibility timeout) - requires READ permission"""
-    try:
-        service = get_queue_service()
-        messages = await service.receive_messages(
-            queue_name=queue_name,
-            max_messages=max_messages,
-            visibility_timeout=visibility_timeout,
-            consumer_id=consumer_id,
-            remove_after_receive=delete_after_receive,
-            only_new=only_new
-        )
-        
-        response = MessagesResponse(
-            messages=messages,
-            count=len(messages),
-            total=len(messages),
-            offset=0,
-            limit=max_messages,
-            has_more=len(messages) == max_messages
-        )
-        logger.debug("Receive messages response payload: %s", response.model_dump())
-        return response
-    except Exception as e:
-        logger.error(f"Error receiving messages from queue {queue_name}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.delete("/queues/{queue_name}/messages/{receipt_handle}")
+    messages = await service.receive_messages(
+        queue_name=queue_name,
+        max_messages=max_messages,
+        visibility_timeout=visibility_timeout,
+        consumer_id=consumer_id,
+        remove_after_receive=delete_after_receive,
+        only_new=only_new
+    )
+    
+    # Shaped like MessagesResponse, serialized without building the models
+    payload = {
+        "messages": messages,
+        "count": len(messages),
+        "total": len(messages),
+        "offset": 0,
+        "limit": max_messages,
+        "has_more": len(messages) == max_messages
+    }
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Receive messages response payload: %s", payload)
+    return Response(content=orjson.dumps(payload), media_type="application/json")
+
+@queue_router.delete("/messages/batch", response_model=BatchResponse)
+async def delete_messages_batch(
+    queue_name: str = Path(..., description=QUEUE_NAME_DESC),
+    batch_request: BatchDeleteRequest = ...,
+    queue_access: QueueAccess = Depends(_REQ_DELETE),
+    service: QueueService = Depends(get_service)
+):
+    """Delete up to 1000 messages by ID and/or receipt handle in one request - requires DELETE permission"""
+    async def _delete(delete_func: Callable[[str, str], Awaitable[bool]], key: str) -> bool:
+        if not await delete_func(queue_name, key):
+            raise LookupError(MESSAGE_NOT_FOUND)
+        return True
+
+    operations = [
+        (message_id, partial(_delete, service.delete_message_by_id, message_id))
+        for message_id in batch_request.message_ids
+    ]
+    operations.extend(
+        (receipt_handle, partial(_delete, service.delete_message, receipt_handle))
+        for receipt_handle in batch_request.receipt_handles
+    )
+    return await _run_batch(operations)
+
+@queue_router.delete("/messages/{receipt_handle}", response_class=ORJSONResponse)
 async def delete_message(
     queue_name: str = Path(..., description=QUEUE_NAME_DESC),
     receipt_handle: str = Path(..., description="Receipt handle of the message to delete"),
-    queue_access: QueueAccess = Depends(require_queue_permission(QueuePermission.DELETE))
+    queue_access: QueueAccess = Depends(_REQ_DELETE),
+    service: QueueService = Depends(get_service)
 ):
     """Delete a message using its receipt handle - requires DELETE permission"""
-    try:
-        service = get_queue_service()
-        success = await service.delete_message(queue_name, receipt_handle)
-        
-        if not success:
-            raise HTTPException(status_code=404, detail=MESSAGE_NOT_FOUND)
-        
-        return {"status": "success", "message": "Message deleted"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error deleting message from queue {queue_name}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.delete("/queues/{queue_name}/messages/by-id/{message_id}")
+    success = await service.delete_message(queue_name, receipt_handle)
+    
+    if not success:
+        raise HTTPException(status_code=404, detail=MESSAGE_NOT_FOUND)
+    
+    return Response(content=_DELETED_BODY, media_type="application/json")
+
+@queue_router.delete("/messages/by-id/{message_id}", response_class=ORJSONResponse)
 async def delete_message_by_id(
     queue_name: str = Path(..., description=QUEUE_NAME_DESC),
     message_id: str = Path(..., description="ID of the message to delete"),
-    queue_access: QueueAccess = Depends(require_queue_permission(QueuePermission.DELETE))
+    queue_access: QueueAccess = Depends(_REQ_DELETE),
+    service: QueueService = Depends(get_service)
 ):
     """Delete a message by its ID - requires DELETE permission"""
-    try:
-        service = get_queue_service()
-        success = await service.delete_message_by_id(queue_name, message_id)
-        
-        if not success:
-            raise HTTPException(status_code=404, detail=MESSAGE_NOT_FOUND)
-        
-        return {"status": "success", "message": "Message deleted"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error deleting message from queue {queue_name}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    success = await service.delete_message_by_id(queue_name, message_id)
+    
+    if not success:
+        raise HTTPException(status_code=404, detail=MESSAGE_NOT_FOUND)
+    
+    return Response(content=_DELETED_BODY, media_type="application/json")
 
 #get message by id
-@router.get("/queues/{queue_name}/message/{message_id}", response_model=QueueMessage)
+@queue_router.get("/message/{message_id}", response_model=QueueMessage)
 async def get_message_by_id(
     queue_name: str = Path(..., description=QUEUE_NAME_DESC),
     message_id: str = Path(..., description="ID of the message to retrieve"),
-    queue_access: QueueAccess = Depends(require_queue_permission(QueuePermission.READ))
+    queue_access: QueueAccess = Depends(_REQ_READ),
+    service: QueueService = Depends(get_service)
 ):
     """Get a message by its ID - requires READ permission"""
-    try:
-        service = get_queue_service()
-        message = await service.get_message_by_id(queue_name, message_id)
-        
-        if not message:
-            raise HTTPException(status_code=404, detail=MESSAGE_NOT_FOUND)
-        
-        return message
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error getting message from queue {queue_name}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.post("/queues/{queue_name}/messages/check-existence", response_model=CheckExistenceResponse)
+    message = await service.get_message_by_id(queue_name, message_id)
+    
+    if not message:
+        raise HTTPException(status_code=404, detail=MESSAGE_NOT_FOUND)
+    
+    # Shaped like QueueMessage, serialized without building the model
+    return Response(content=orjson.dumps(message), media_type="application/json")
+
+@queue_router.post("/messages/check-existence", response_model=CheckExistenceResponse)
 async def check_messages_existence(
     queue_name: str = Path(..., description=QUEUE_NAME_DESC),
     check_request: CheckExistenceRequest = ...,
-    queue_access: QueueAccess = Depends(require_queue_permission(QueuePermission.READ))
+    queue_access: QueueAccess = Depends(_REQ_READ),
+    service: QueueService = Depends(get_service)
 ):
     """Check which message IDs exist in the queue - requires READ permission"""
-    try:
-        service = get_queue_service()
-        existing_ids = await service.check_messages_existence(
-            queue_name=queue_name,
-            message_ids=check_request.message_ids
-        )
-        return CheckExistenceResponse(existing_ids=existing_ids)
-    except Exception as e:
-        logger.error(f"Error checking messages existence in {queue_name}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    existing_ids = await service.check_messages_existence(
+        queue_name=queue_name,
+        message_ids=check_request.message_ids
+    )
+    return CheckExistenceResponse(existing_ids=existing_ids)
     
-@router.put("/queues/{queue_name}/messages/by-id/{message_id}")
+@queue_router.put("/messages/by-id/{message_id}", response_class=ORJSONResponse)
 async def update_message(
     queue_name: str = Path(..., description=QUEUE_NAME_DESC),
     message_id: str = Path(..., description="ID of the message to update"),
     message_request: MessageRequest = ...,
-    queue_access: QueueAccess = Depends(require_queue_permission(QueuePermission.WRITE))
+    queue_access: QueueAccess = Depends(_REQ_WRITE),
+    service: QueueService = Depends(get_service)
 ):
     """Update a message's content - requires WRITE permission"""
-    try:
-        service = get_queue_service()
-        
-        # Convert string messages to dict format for storage
-        message_body = message_request.message_body
-        if isinstance(message_body, str):
-            message_body = {"content": message_body}
-        
-        success = await service.update_message(
-            queue_name=queue_name,
-            message_id=message_id,
-            new_message_body=message_body
-        )
-        
-        if not success:
-            raise HTTPException(status_code=404, detail=MESSAGE_NOT_FOUND)
-        
-        return {"status": "success", "message": "Message updated"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error updating message in queue {queue_name}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.delete("/queues/{queue_name}/messages")
+    success = await service.update_message(
+        queue_name=queue_name,
+        message_id=message_id,
+        new_message_body=message_request.message_body
+    )
+    
+    if not success:
+        raise HTTPException(status_code=404, detail=MESSAGE_NOT_FOUND)
+    
+    return Response(content=_UPDATED_BODY, media_type="application/json")
+
+@queue_router.delete("/messages", response_class=ORJSONResponse)
 async def clear_queue(
     queue_name: str = Path(..., description=QUEUE_NAME_DESC),
-    queue_access: QueueAccess = Depends(require_queue_permission(QueuePermission.MANAGE))
+    queue_access: QueueAccess = Depends(_REQ_MANAGE),
+    service: QueueService = Depends(get_service)
 ):
     """Clear all messages from the specified queue - requires MANAGE permission"""
-    try:
-        service = get_queue_service()
-        await service.clear_queue(queue_name)
-        return {"status": "success", "message": "Queue cleared"}
-    except Exception as e:
-        logger.error(f"Error clearing queue {queue_name}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/queues/{queue_name}/info", response_model=QueueInfo)
+    await service.clear_queue(queue_name)
+    return Response(content=_CLEARED_BODY, media_type="application/json")
+
+@queue_router.get("/info", response_model=QueueInfo)
 async def get_queue_info(
+    request: Request,
     queue_name: str = Path(..., description=QUEUE_NAME_DESC),
-    queue_access: QueueAccess = Depends(require_queue_permission(QueuePermission.READ))
+    queue_access: QueueAccess = Depends(_REQ_READ),
+    service: QueueService = Depends(get_service)
 ):
     """Get information about the specified queue - requires READ permission"""
-    try:
-        service = get_queue_service()
-        queue_info = await service.get_queue_info(queue_name)
-        return queue_info
-    except Exception as e:
-        logger.error(f"Error getting queue info for {queue_name}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/queues/{queue_name}/health", response_model=HealthResponse)
+    queue_info, etag = await service.get_queue_info_with_etag(queue_name)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=queue_info.model_dump_json(), media_type="application/json", headers={"ETag": etag})
+
+@queue_router.get("/health", response_model=HealthResponse)
 async def queue_health_check(
     queue_name: str = Path(..., description=QUEUE_NAME_DESC),
-    queue_access: QueueAccess = Depends(require_queue_permission(QueuePermission.READ))
+    queue_access: QueueAccess = Depends(_REQ_READ),
+    service: QueueService = Depends(get_service)
 ):
     """Health check for a specific queue - requires READ permission"""
-    try:
-        service = get_queue_service()
-        is_healthy = await service.health_check(queue_name)
-        
-        if not is_healthy:
-            raise HTTPException(status_code=503, detail="Queue is not healthy")
-        
-        return HealthResponse(
-            status="healthy",
-            queue_name=queue_name
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Health check failed for queue {queue_name}: {e}")
-        raise HTTPException(status_code=503, detail="Health check failed")
-
-@router.get("/queues")
+    is_healthy = await service.health_check(queue_name)
+    
+    if not is_healthy:
+        raise HTTPException(status_code=503, detail="Queue is not healthy")
+    
+    return HealthResponse(
+        status="healthy",
+        queue_name=queue_name
+    )
+
+@router.get("/queues", response_class=ORJSONResponse)
 async def list_queues(
-    api_key_config: APIKeyConfig = Depends(get_api_key_config)
+    api_key_config: APIKeyConfig = Depends(get_api_key_config),
+    service: QueueService = Depends(get_service)
 ):
     """List queues accessible to the current API key"""
-    try:
-        accessible_queues = list(api_key_config.get_accessible_queues())
-        
-        # If wildcard access, list all existing queues
-        if "*" in api_key_config.queues:
-            service = get_queue_service()
-            all_queues = await service.list_queues()
-            accessible_queues = all_queues
-        
-        queue_infos = []
-        for queue_name in accessible_queues:
-            try:
-                service = get_queue_service()
-                info = await service.get_queue_info(queue_name)
-                queue_infos.append({
-                    "queue_name": queue_name,
-                    "message_count": info.message_count,
-                    "available_messages": info.available_messages,
-                    "in_flight_messages": info.in_flight_messages,
-                    "permissions": api_key_config.queues.get(queue_name, api_key_config.queues.get("*", []))
-                })
-            except Exception:
-                # Queue might not exist yet
-                queue_infos.append({
-                    "queue_name": queue_name,
-                    "message_count": 0,
-                    "available_messages": 0,
-                    "in_flight_messages": 0,
-                    "permissions": api_key_config.queues.get(queue_name, api_key_config.queues.get("*", []))
-                })
-        
-        return {
-            "queues": queue_infos,
-            "count": len(queue_infos),
-            "api_key_description": api_key_config.description
-        }
-    except Exception as e:
-        logger.error(f"Error listing queues: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    cached = _LIST_CACHE.get(api_key_config)
+    if cached is not None:
+        return cached
+    async with _LIST_LOCK:
+        # Another request may have filled the entry while we waited
+        cached = _LIST_CACHE.get(api_key_config)
+        if cached is None:
+            cached = _LIST_CACHE[api_key_config] = await _list_accessible_queues(api_key_config, service)
+    return cached
+
+async def _list_accessible_queues(api_key_config: APIKeyConfig, service: QueueService) -> dict:
+    """Build the queue listing for an API key, fetching all queue stats in one storage call"""
+    accessible_queues = list(api_key_config.get_accessible_queues())
+    
+    # If wildcard access, list all existing queues
+    if api_key_config.is_wildcard:
+        all_queues = await service.list_queues()
+        accessible_queues = all_queues
+    
+    infos = await service.get_queue_infos(accessible_queues)
+    queue_infos = []
+    for queue_name in accessible_queues:
+        info = infos[queue_name]
+        queue_infos.append({
+            "queue_name": queue_name,
+            "message_count": info.message_count,
+            "available_messages": info.available_messages,
+            "in_flight_messages": info.in_flight_messages,
+            "permissions": api_key_config.queues.get(queue_name, api_key_config.queues.get("*", []))
+        })
+    
+    return {
+        "queues": queue_infos,
+        "count": len(queue_infos),
+        "api_key_description": api_key_config.description
+    }
 
 @router.get("/health", response_model=HealthResponse)
-async def global_health_check():
+async def global_health_check(
+    service: QueueService = Depends(get_service)
+):
     """Global health check for the queue service - no authentication required"""
-    try:
-        service = get_queue_service()
-        is_healthy = await service.health_check()
-        
-        if not is_healthy:
-            raise HTTPException(status_code=503, detail="Service is not healthy")
-        
-        return HealthResponse(status="healthy")
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Global health check failed: {e}")
-        raise HTTPException(status_code=503, detail="Health check failed")
+    is_healthy = await service.health_check()
+    
+    if not is_healthy:
+        raise HTTPException(status_code=503, detail="Service is not healthy")
+    
+    return HealthResponse(status="healthy")
 
 # API Key management endpoints
-@router.get("/auth/me")
+@auth_router.get("/me", response_class=ORJSONResponse)
 async def get_current_user_info(
     api_key_config: APIKeyConfig = Depends(get_api_key_config)
 ):
     """Get information about the current API key"""
+    cached = _AUTH_ME_CACHE.get(api_key_config)
+    if cached is None:
+        cached = _AUTH_ME_CACHE[api_key_config] = _describe_api_key(api_key_config)
+    return cached
+
+def _describe_api_key(api_key_config: APIKeyConfig) -> dict:
+    """Summarize an API key's accessible queues and permissions"""
     accessible_queues = list(api_key_config.get_accessible_queues())
     
     # Count permissions per queue
     permissions_summary = {}
     for queue_name, permissions in api_key_config.queues.items():
+        mask = api_key_config.permission_masks[queue_name]
         permissions_summary[queue_name] = {
             "permissions": permissions,
-            "can_read": QueuePermission.READ.value in permissions,
-            "can_write": QueuePermission.WRITE.value in permissions,
-            "can_delete": QueuePermission.DELETE.value in permissions,
-            "can_manage": QueuePermission.MANAGE.value in permissions
+            "can_read": bool(mask & QueuePermission.READ),
+            "can_write": bool(mask & QueuePermission.WRITE),
+            "can_delete": bool(mask & QueuePermission.DELETE),
+            "can_manage": bool(mask & QueuePermission.MANAGE)
         }
     
     return {
@@ -371,21 +458,20 @@ async def get_current_user_info(
         "total_accessible_queues": len(accessible_queues)
     }
 
-@router.get("/auth/permissions/{queue_name}")
+@auth_router.get("/permissions/{queue_name}", response_class=ORJSONResponse)
 async def check_queue_permissions(
     queue_name: str = Path(..., description="Queue name to check permissions for"),
     api_key_config: APIKeyConfig = Depends(get_api_key_config)
 ):
     """Check what permissions the current API key has for a specific queue"""
-    from app.core.security import api_key_manager
+    # Resolve the permission mask once; wildcard grants take precedence as in check_queue_access
+    mask = api_key_config.permissions_for(queue_name)
     
-    permissions = {
+    return {
         "queue_name": queue_name,
-        "has_access": queue_name in api_key_config.queues or "*" in api_key_config.queues,
-        "can_read": api_key_manager.check_queue_access(api_key_config, queue_name, QueuePermission.READ),
-        "can_write": api_key_manager.check_queue_access(api_key_config, queue_name, QueuePermission.WRITE),
-        "can_delete": api_key_manager.check_queue_access(api_key_config, queue_name, QueuePermission.DELETE),
-        "can_manage": api_key_manager.check_queue_access(api_key_config, queue_name, QueuePermission.MANAGE)
+        "has_access": api_key_config.is_wildcard or queue_name in api_key_config.queues,
+        "can_read": bool(mask & QueuePermission.READ),
+        "can_write": bool(mask & QueuePermission.WRITE),
+        "can_delete": bool(mask & QueuePermission.DELETE),
+        "can_manage": bool(mask & QueuePermission.MANAGE)
     }
-    
-    return permissions
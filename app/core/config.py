@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from typing import Optional, Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,6 +11,10 @@ class Settings(BaseSettings):
     PORT: int = 8000
     DEBUG: bool = True
     LOG_LEVEL: str = "INFO"
+    WORKERS: int = 1  # JSON storage state is per-process; scale out only with SQLite
+    TIMEOUT_KEEP_ALIVE: int = 30  # seconds
+    BACKLOG: int = 4096
+    LIMIT_CONCURRENCY: Optional[int] = 2048
     
     # Storage configuration
     STORAGE_BACKEND: Literal["json", "sqlite"] = "json"  # Default to minimal version
@@ -28,8 +33,14 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
         case_sensitive=True,
+        frozen=True,
         extra="ignore"  # Ignora variabili d'ambiente non definite nel modello
     )
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the cached settings instance (usable as a FastAPI dependency)"""
+    return Settings()
+
 # Create global settings instance
-settings = Settings()
+settings = get_settings()
@@ -1,17 +1,21 @@
 # Storage module
-from .base import StorageBackend
+from typing import Callable, Dict
+
+from .base import StorageBackend, StorageError
 from .json_storage import JSONStorage
 from .sqlite_storage import SQLiteStorage
 
+_BACKENDS: Dict[str, Callable[..., StorageBackend]] = {
+    "json": lambda **kwargs: JSONStorage(kwargs.get("data_dir", "./data")),
+    "sqlite": lambda **kwargs: SQLiteStorage(kwargs.get("db_path", "./data/pyqueue.db")),
+}
+
 def create_storage_backend(backend_type: str, **kwargs) -> StorageBackend:
     """Factory function to create storage backend instances"""
-    if backend_type == "json":
-        data_dir = kwargs.get("data_dir", "./data")
-        return JSONStorage(data_dir)
-    elif backend_type == "sqlite":
-        db_path = kwargs.get("db_path", "./data/pyqueue.db")
-        return SQLiteStorage(db_path)
-    else:
-        raise ValueError(f"Unknown storage backend: {backend_type}")
+    try:
+        factory = _BACKENDS[backend_type]
+    except KeyError:
+        raise ValueError(f"Unknown storage backend: {backend_type}") from None
+    return factory(**kwargs)
 
-__all__ = ["StorageBackend", "JSONStorage", "SQLiteStorage", "create_storage_backend"]
+__all__ = ["StorageBackend", "StorageError", "JSONStorage", "SQLiteStorage", "create_storage_backend"]
@@ -1,28 +1,60 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple, AsyncIterator
 import asyncio
 
+class StorageError(Exception):
+    """Raised when a storage backend cannot read or persist queue data"""
+
 class StorageBackend(ABC):
     """Abstract base class for storage backends following PyQueue patterns"""
     
     def __init__(self):
-        self.lock = asyncio.Lock()
+        self._lock: Optional[asyncio.Lock] = None
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    @property
+    def lock(self) -> asyncio.Lock:
+        """Backend-wide lock, created on first use so it binds to the running event loop"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+    
+    def _lock_for(self, queue_name: str) -> asyncio.Lock:
+        """Per-queue lock, so operations on different queues don't wait on each other"""
+        lock = self._locks.get(queue_name)
+        if lock is None:
+            lock = self._locks[queue_name] = asyncio.Lock()
+        return lock
     
     @abstractmethod
     async def initialize(self) -> None:
         """Initialize the storage backend"""
         pass
     
+    async def close(self) -> None:
+        """Release resources held by the storage backend"""
+        pass
+    
     @abstractmethod
     async def add_message(self, queue_name: str, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """Add message to queue - async operation with proper error handling"""
         pass
     
+    async def add_messages(self, queue_name: str, messages_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add several messages to queue, in order; backends override this to write them in one go"""
+        return [await self.add_message(queue_name, message_data) for message_data in messages_data]
+    
     @abstractmethod
     async def get_messages(self, queue_name: str, limit: int = 10, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
         """Get messages from queue (non-destructive read) and total count for pagination"""
         pass
     
+    async def iter_messages(self, queue_name: str, limit: int = 10, offset: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate messages from queue (non-destructive read) without building the whole page up front"""
+        messages, _ = await self.get_messages(queue_name, limit, offset)
+        for message in messages:
+            yield message
+    
     @abstractmethod
     async def receive_messages(
         self,
@@ -55,6 +87,10 @@ class StorageBackend(ABC):
     async def get_message_by_id(self, queue_name: str, message_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific message by its ID"""
         pass
+    
+    async def get_existing_message_ids(self, queue_name: str, message_ids: List[str]) -> Set[str]:
+        """Return which of the given message IDs exist in the queue; backends override this to check them in one go"""
+        return {message_id for message_id in message_ids if await self.get_message_by_id(queue_name, message_id)}
 
     @abstractmethod
     async def clear_queue(self, queue_name: str) -> int:
@@ -66,6 +102,11 @@ class StorageBackend(ABC):
         """Get queue information and statistics"""
         pass
     
+    async def get_queue_infos(self, queue_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get information for several queues at once, keyed by queue name"""
+        infos = await asyncio.gather(*(self.get_queue_info(queue_name) for queue_name in queue_names))
+        return dict(zip(queue_names, infos))
+    
     @abstractmethod
     async def list_queues(self) -> List[str]:
         """List all available queues"""
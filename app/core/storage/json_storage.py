@@ -1,150 +1,557 @@
-import json
+import asyncio
+import heapq
 import os
+import sys
+import time
 import uuid
-import asyncio
-from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Set, Tuple
 from pathlib import Path
-import aiofiles
 import logging
+import orjson
 
-from .base import StorageBackend
+from .base import StorageBackend, StorageError
 
 logger = logging.getLogger(__name__)
 
 
+def _to_epoch(value: Any) -> Optional[float]:
+    """Convert a stored timestamp to epoch seconds; older versions wrote ISO strings"""
+    if type(value) is str:
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    return value
+
+
+# Blocking file helpers, each run as a single asyncio.to_thread call
+
+def _read_file(path: Path) -> Optional[bytes]:
+    """Read a whole file, or return None if it doesn't exist"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _read_queue_files(queue_file: Path, log_file: Path) -> Tuple[Optional[bytes], Optional[bytes]]:
+    """Read a queue's snapshot and journal together, so loading costs one thread hop"""
+    return _read_file(queue_file), _read_file(log_file)
+
+
+def _append_file(fd: Optional[int], path: Path, data: bytes) -> int:
+    """Append bytes through an O_APPEND descriptor, opening one first if none is cached; returns it"""
+    if fd is None:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    except OSError:
+        os.close(fd)
+        raise
+    return fd
+
+
+def _write_snapshot(queue_file: Path, log_file: Path, log_fd: Optional[int], data: bytes) -> None:
+    """Atomically replace a queue snapshot and drop the journal it supersedes, closing its descriptor"""
+    if log_fd is not None:
+        os.close(log_fd)
+    tmp_file = queue_file.with_name(queue_file.name + ".tmp")
+    with open(tmp_file, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_file, queue_file)
+    log_file.unlink(missing_ok=True)
+
+
+@dataclass(slots=True)
+class _StoredMessage:
+    """A message as the JSON backend keeps it in memory; orjson writes it out as a plain object"""
+    id: str
+    message_id: str
+    message_body: Any
+    attributes: Dict[str, Any]
+    timestamp: Optional[float]
+    status: str = 'available'
+    receive_count: int = 0
+    receipt_handle: Optional[str] = None
+    visibility_timeout_until: Optional[float] = None
+    delivery_history: Optional[List[str]] = None
+    
+    @classmethod
+    def from_record(cls, item: Dict[str, Any]) -> "_StoredMessage":
+        """Build a message from a snapshot or journal object, filling in fields older versions didn't write"""
+        message_id = item['id'] if 'id' in item else item.get('message_id', str(uuid.uuid4()))
+        visibility_until = item.get('visibility_timeout_until')
+        if type(visibility_until) is str:
+            # ISO string written by an older version; an invalid one expires right away
+            visibility_until = _to_epoch(visibility_until) or 0.0
+        return cls(
+            id=message_id,
+            message_id=item.get('message_id', message_id),
+            message_body=item.get('message_body', {}),
+            attributes=item.get('attributes', {}),
+            # Timestamps are kept as epoch seconds; convert ISO strings once on load
+            timestamp=_to_epoch(item.get('timestamp')),
+            # Interned, so status compares against the literals below hit the identity fast path
+            status=sys.intern(item.get('status', 'available')),
+            receive_count=item.get('receive_count', 0),
+            receipt_handle=item.get('receipt_handle'),
+            visibility_timeout_until=visibility_until,
+            delivery_history=item.get('delivery_history')
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the stored fields as a new dict, the shape the storage API hands out"""
+        return {
+            "id": self.id,
+            "message_id": self.message_id,
+            "message_body": self.message_body,
+            "attributes": self.attributes,
+            "timestamp": self.timestamp,
+            "status": self.status,
+            "receive_count": self.receive_count,
+            "receipt_handle": self.receipt_handle,
+            "visibility_timeout_until": self.visibility_timeout_until,
+            "delivery_history": self.delivery_history
+        }
+
+
 class JSONStorage(StorageBackend):
-    """JSON file storage backend for PyQueue (legacy compatibility)"""
+    """JSON file storage backend for PyQueue (legacy compatibility)
+
+    Each queue is a snapshot file (``{queue}.json``) plus an append-only journal
+    (``{queue}.log``) of newline-delimited records. Mutations apply to the
+    in-memory queue, buffer a journal record and wait for a background task
+    to append it; concurrent mutations share one append (group commit). The
+    snapshot is rewritten once the journal outgrows it.
+    """
+    
+    # Journal bytes allowed per live snapshot byte before compacting
+    COMPACT_RATIO = 2
+    # Floor for the compaction threshold, so small queues don't compact on every write
+    COMPACT_MIN_BYTES = 64 * 1024
+    # With at least FLUSH_BATCH_MIN mutations waiting, the flusher holds off for
+    # FLUSH_WINDOW seconds to gather more into the same append; below it, it flushes at once
+    FLUSH_BATCH_MIN = 8
+    FLUSH_WINDOW = 0.002
     
     def __init__(self, data_dir: str):
         super().__init__()
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
-        self._locks: Dict[str, asyncio.Lock] = {}
+        # Live messages per queue keyed by id, in FIFO (insertion) order, built from
+        # snapshot + journal on first access
+        self._queues: Dict[str, Dict[str, _StoredMessage]] = {}
+        # Per-queue receipt handle -> message id, and legacy message_id -> id where they differ
+        self._receipts: Dict[str, Dict[str, str]] = {}
+        self._aliases: Dict[str, Dict[str, str]] = {}
+        # Per-queue ids of available messages in FIFO order (a dict as an ordered set),
+        # and a heap of (visibility deadline, id) for in-flight ones, so receive never
+        # walks the whole queue. Heap entries are dropped lazily once they no longer
+        # match their message's deadline
+        self._available: Dict[str, Dict[str, None]] = {}
+        self._inflight: Dict[str, List[Tuple[float, str]]] = {}
+        self._live_bytes: Dict[str, int] = {}
+        # Per-queue time of first access, the info timestamps of a queue with nothing on disk
+        self._first_seen: Dict[str, datetime] = {}
+        self._log_bytes: Dict[str, int] = {}
+        # Running background compactions, at most one per queue
+        self._compactions: Dict[str, asyncio.Task] = {}
+        # Encoded journal records not yet written per queue, and the future their
+        # mutations wait on until the records are on disk
+        self._pending: Dict[str, List[bytes]] = {}
+        self._flushed: Dict[str, asyncio.Future] = {}
+        # Open journal descriptors, kept across flushes instead of reopening the file each time
+        self._fds: Dict[str, int] = {}
+        # Background flusher, woken whenever records are buffered
+        self._flusher: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        # Queue names from the last directory scan, valid while the directory mtime is unchanged
+        self._queue_names: Optional[List[str]] = None
+        self._queue_names_mtime: int = 0
     
     def _get_queue_file(self, queue_name: str) -> Path:
         """Get the file path for a queue"""
         return self.data_dir / f"{queue_name}.json"
     
-    def _get_lock(self, queue_name: str) -> asyncio.Lock:
-        """Get or create a lock for a queue"""
-        if queue_name not in self._locks:
-            self._locks[queue_name] = asyncio.Lock()
-        return self._locks[queue_name]
+    def _get_log_file(self, queue_name: str) -> Path:
+        """Get the journal file path for a queue"""
+        return self.data_dir / f"{queue_name}.log"
     
     async def initialize(self) -> None:
-        """Initialize JSON storage (ensure directory exists)"""
+        """Initialize JSON storage (ensure directory exists) and create locks for existing queues"""
         self.data_dir.mkdir(exist_ok=True)
+        for queue_name in await self.list_queues():
+            self._locks.setdefault(queue_name, asyncio.Lock())
     
-    async def _load_queue(self, queue_name: str) -> List[Dict[str, Any]]:
-        """Load queue from JSON file"""
-        queue_file = self._get_queue_file(queue_name)
-        
-        if not queue_file.exists():
+    async def close(self) -> None:
+        """Stop the background flusher, then wait for compactions and write what is still buffered"""
+        self._closing = True
+        self._wakeup.set()
+        if self._flusher is not None:
+            await self._flusher
+            self._flusher = None
+        if self._compactions:
+            await asyncio.gather(*self._compactions.values())
+        await self._flush_pending()
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+    
+    def _parse_snapshot(self, queue_name: str, content: Optional[bytes]) -> List[_StoredMessage]:
+        """Parse and normalize the contents of a queue snapshot file"""
+        if content is None:
             return []
         
         try:
-            async with aiofiles.open(queue_file, 'r') as f:
-                content = await f.read()
-                if not content.strip():
-                    return []
-                
-                data = json.loads(content)
-                
-                # Normalize data structure for compatibility
-                for item in data:
-                    # Ensure required fields exist
-                    if 'id' not in item:
-                        item['id'] = item.get('message_id', str(uuid.uuid4()))
-                    if 'message_id' not in item:
-                        item['message_id'] = item['id']
-                    if 'status' not in item:
-                        item['status'] = 'available'
-                    if 'receive_count' not in item:
-                        item['receive_count'] = 0
-                    if 'attributes' not in item:
-                        item['attributes'] = {}
-                
-                return data
-        except json.JSONDecodeError as e:
+            self._live_bytes[queue_name] = len(content)
+            if not content.strip():
+                return []
+            
+            return [_StoredMessage.from_record(item) for item in orjson.loads(content)]
+        except orjson.JSONDecodeError as e:
             logger.error(f"Error loading queue {queue_name}: {e}")
             return []
     
-    async def _save_queue(self, queue_name: str, messages: List[Dict[str, Any]]):
-        """Save queue to JSON file"""
-        queue_file = self._get_queue_file(queue_name)
+    async def _load_queue(self, queue_name: str) -> Dict[str, _StoredMessage]:
+        """Return the live message store, replaying the journal over the snapshot on first access"""
+        store = self._queues.get(queue_name)
+        if store is not None:
+            return store
+        
+        # The cache was dropped after an error; get buffered records on disk before rereading
+        await self._write_pending(queue_name)
+        snapshot, journal = await asyncio.to_thread(
+            _read_queue_files, self._get_queue_file(queue_name), self._get_log_file(queue_name)
+        )
+        store = {msg.id: msg for msg in self._parse_snapshot(queue_name, snapshot)}
+        log_bytes = 0
+        if journal is not None:
+            log_bytes = len(journal)
+            self._replay(queue_name, store, journal)
         
+        self._set_store(queue_name, store)
+        self._log_bytes[queue_name] = log_bytes
+        return store
+    
+    async def _read_store(self, queue_name: str) -> Dict[str, _StoredMessage]:
+        """Return the message store for a read-only operation; only a cache miss takes the queue lock"""
+        # Reads finish without awaiting, so on the event loop they always see a whole mutation
+        store = self._queues.get(queue_name)
+        if store is None:
+            async with self._lock_for(queue_name):
+                store = await self._load_queue(queue_name)
+        return store
+    
+    def _set_store(self, queue_name: str, store: Dict[str, _StoredMessage]) -> None:
+        """Cache a queue's message store and build its indexes"""
+        receipts: Dict[str, str] = {}
+        aliases: Dict[str, str] = {}
+        available: Dict[str, None] = {}
+        inflight: List[Tuple[float, str]] = []
+        for message_id, msg in store.items():
+            if msg.receipt_handle:
+                receipts[msg.receipt_handle] = message_id
+            if msg.message_id != message_id:
+                aliases.setdefault(msg.message_id, message_id)
+            if msg.status == 'available':
+                available[message_id] = None
+            elif msg.status == 'in_flight' and msg.visibility_timeout_until is not None:
+                inflight.append((msg.visibility_timeout_until, message_id))
+        heapq.heapify(inflight)
+        self._queues[queue_name] = store
+        self._receipts[queue_name] = receipts
+        self._aliases[queue_name] = aliases
+        self._available[queue_name] = available
+        self._inflight[queue_name] = inflight
+    
+    def _drop_store(self, queue_name: str) -> None:
+        """Forget a queue's cached state, so the next access reloads it from disk"""
+        self._queues.pop(queue_name, None)
+        self._receipts.pop(queue_name, None)
+        self._aliases.pop(queue_name, None)
+        self._available.pop(queue_name, None)
+        self._inflight.pop(queue_name, None)
+    
+    def _find(self, queue_name: str, message_id: str) -> Optional[_StoredMessage]:
+        """Look up a loaded message by id, or by a legacy message_id that differs from it"""
+        store = self._queues[queue_name]
+        msg = store.get(message_id)
+        if msg is None:
+            alias = self._aliases[queue_name].get(message_id)
+            if alias is not None:
+                msg = store.get(alias)
+        return msg
+    
+    def _remove(self, queue_name: str, msg: _StoredMessage) -> None:
+        """Remove a message from the loaded queue and its indexes"""
+        store = self._queues[queue_name]
+        available = self._available[queue_name]
+        del store[msg.id]
+        available.pop(msg.id, None)
+        if msg.receipt_handle:
+            self._receipts[queue_name].pop(msg.receipt_handle, None)
+        if msg.message_id != msg.id:
+            self._aliases[queue_name].pop(msg.message_id, None)
+        
+        # A removed in-flight message's heap entry is skipped when it surfaces; if such
+        # entries pile up (long visibility timeouts), rebuild the heap from live messages
+        inflight = self._inflight[queue_name]
+        if len(inflight) > 2 * (len(store) - len(available)) + 64:
+            inflight[:] = [
+                (m.visibility_timeout_until, m.id) for m in store.values()
+                if m.status == 'in_flight' and m.visibility_timeout_until is not None
+            ]
+            heapq.heapify(inflight)
+    
+    @staticmethod
+    def _replay(queue_name: str, live: Dict[str, _StoredMessage], content: bytes) -> None:
+        """Apply journal records to the snapshot messages, in place"""
+        # Records are keyed by id and upserted, so replaying a journal that was
+        # already folded into the snapshot (crash mid-compaction) is harmless
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                # A torn final write from a crash; everything before it is intact
+                logger.warning(f"Skipping corrupt journal record in queue {queue_name}")
+                continue
+            if record['op'] == 'del':
+                live.pop(record['id'], None)
+            else:
+                msg = _StoredMessage.from_record(record['msg'])
+                live[msg.id] = msg
+    
+    def _append_records(self, queue_name: str, records: List[Dict[str, Any]]) -> asyncio.Future:
+        """Buffer journal records for mutations already applied in memory, compacting when the journal grows too large
+
+        Returns a future that resolves once the records are on disk; callers release
+        the queue lock before awaiting it, so the flusher can take the lock and
+        other mutations can join the same write.
+        """
         try:
-            # Ensure all datetime objects are serialized as ISO strings
-            serializable_messages = []
-            for msg in messages:
-                msg_copy = msg.copy()
-                for field in ['timestamp', 'visibility_timeout', 'visibility_timeout_until']:
-                    if field in msg_copy and isinstance(msg_copy[field], datetime):
-                        msg_copy[field] = msg_copy[field].isoformat()
-                serializable_messages.append(msg_copy)
-            
-            async with aiofiles.open(queue_file, 'w') as f:
-                await f.write(json.dumps(serializable_messages, indent=2, default=str))
-        except Exception as e:
-            logger.error(f"Error saving queue {queue_name}: {e}")
+            content = b"".join(
+                orjson.dumps(record) + b"\n"
+                for record in records
+            )
+        except TypeError as e:
+            # The in-memory state is ahead of the disk; reload it on next access
+            self._drop_store(queue_name)
+            logger.error(f"Error encoding queue journal record {queue_name}: {e}")
+            raise StorageError(f"Could not save queue '{queue_name}'") from e
+        
+        self._pending.setdefault(queue_name, []).append(content)
+        flushed = self._flushed.get(queue_name)
+        if flushed is None:
+            flushed = self._flushed[queue_name] = asyncio.get_running_loop().create_future()
+        self._wakeup.set()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+        
+        log_bytes = self._log_bytes.get(queue_name, 0) + len(content)
+        self._log_bytes[queue_name] = log_bytes
+        threshold = self.COMPACT_RATIO * max(self._live_bytes.get(queue_name, 0), self.COMPACT_MIN_BYTES)
+        if log_bytes > threshold and queue_name not in self._compactions:
+            # Compact in the background so the request that crossed the threshold isn't
+            # charged for rewriting the whole queue
+            task = asyncio.create_task(self._compact(queue_name))
+            self._compactions[queue_name] = task
+            task.add_done_callback(lambda _: self._compactions.pop(queue_name, None))
+        return flushed
+    
+    @staticmethod
+    async def _wait_written(flushed: asyncio.Future) -> None:
+        """Wait until a mutation's journal records are on disk; a mutation returns only after this, or raises StorageError"""
+        # Shielded: the future is shared by every mutation in the batch, so one
+        # cancelled request must not cancel the others' wait
+        await asyncio.shield(flushed)
+    
+    async def _write_pending(self, queue_name: str):
+        """Append the queue's buffered journal records to disk and release their waiters; the caller holds the queue lock"""
+        chunks = self._pending.pop(queue_name, None)
+        flushed = self._flushed.pop(queue_name, None)
+        if not chunks:
+            return
+        try:
+            self._fds[queue_name] = await asyncio.to_thread(
+                _append_file, self._fds.pop(queue_name, None), self._get_log_file(queue_name), b"".join(chunks)
+            )
+        except OSError as e:
+            # Memory holds changes the journal never got; fail them and reload from disk
+            self._drop_store(queue_name)
+            logger.error(f"Error appending to queue journal {queue_name}: {e}")
+            error = StorageError(f"Could not save queue '{queue_name}'")
+            if flushed is not None and not flushed.done():
+                flushed.set_exception(error)
+            raise error from e
+        except BaseException:
+            # Anything else (cancellation included) leaves the write's outcome unknown:
+            # reload from disk, and fail the waiters rather than leave them hanging
+            self._drop_store(queue_name)
+            if flushed is not None and not flushed.done():
+                flushed.set_exception(StorageError(f"Could not save queue '{queue_name}'"))
             raise
+        if flushed is not None and not flushed.done():
+            flushed.set_result(None)
+    
+    def _release_pending(self, queue_name: str) -> None:
+        """Drop buffered journal records made redundant by a fresh snapshot, releasing their waiters"""
+        self._pending.pop(queue_name, None)
+        flushed = self._flushed.pop(queue_name, None)
+        if flushed is not None and not flushed.done():
+            flushed.set_result(None)
+    
+    async def _flush_pending(self):
+        """Write the buffered journal records of every queue"""
+        for queue_name in list(self._pending):
+            async with self._lock_for(queue_name):
+                try:
+                    await self._write_pending(queue_name)
+                except StorageError:
+                    # Already logged and reported to the waiting mutations
+                    pass
+                except Exception:
+                    # Waiters were already failed; keep flushing the other queues
+                    logger.exception(f"Unexpected error flushing queue journal {queue_name}")
+    
+    async def _flush_loop(self):
+        """Flush buffered journal records whenever there are some, until the storage is closed"""
+        while not self._closing:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Under load, wait briefly so one append covers more mutations; a lone
+            # mutation is flushed immediately
+            try:
+                if sum(len(chunks) for chunks in self._pending.values()) >= self.FLUSH_BATCH_MIN:
+                    await asyncio.sleep(self.FLUSH_WINDOW)
+                await self._flush_pending()
+            except Exception:
+                # A dead flusher would leave every later write waiting forever
+                logger.exception("Unexpected error in the journal flusher")
+    
+    async def _compact(self, queue_name: str):
+        """Fold the queue journal into a fresh snapshot"""
+        async with self._lock_for(queue_name):
+            store = self._queues.get(queue_name)
+            if store is None:
+                # Dropped after a failed write; the next load replays the journal
+                return
+            try:
+                await self._save_queue(queue_name, store)
+            except StorageError:
+                # Already logged; the journal is intact and the next append retries
+                pass
+    
+    async def _save_queue(self, queue_name: str, store: Dict[str, _StoredMessage]):
+        """Write a full snapshot of the queue and truncate its journal"""
+        try:
+            # orjson serializes the message dataclasses natively and their fields hold only
+            # JSON-native values (timestamps are epoch floats), so it needs no default hook;
+            # anything else fails loudly as a StorageError
+            content = orjson.dumps(list(store.values()))
+            # The journal is about to be unlinked, so its descriptor is closed along with it
+            await asyncio.to_thread(
+                _write_snapshot, self._get_queue_file(queue_name), self._get_log_file(queue_name),
+                self._fds.pop(queue_name, None), content
+            )
+        except (OSError, TypeError, ValueError) as e:
+            self._drop_store(queue_name)
+            logger.error(f"Error saving queue {queue_name}: {e}")
+            raise StorageError(f"Could not save queue '{queue_name}'") from e
+        
+        if store is not self._queues.get(queue_name):
+            self._set_store(queue_name, store)
+        self._live_bytes[queue_name] = len(content)
+        self._log_bytes[queue_name] = 0
+        # The snapshot already reflects anything still buffered for the old journal
+        self._release_pending(queue_name)
     
-    def _generate_receipt_handle(self) -> str:
-        """Generate a unique receipt handle"""
-        return f"receipt_{uuid.uuid4().hex}"
+    def _generate_receipt_handles(self, count: int) -> List[str]:
+        """Generate unique receipt handles, drawing the randomness for all of them in one call"""
+        # Same 128 bits of randomness per handle as uuid4, without building UUID objects
+        raw = os.urandom(16 * count)
+        return [f"receipt_{raw[i:i + 16].hex()}" for i in range(0, 16 * count, 16)]
+    
+    def _insert_message(self, queue_name: str, message_data: Dict[str, Any]) -> Tuple[_StoredMessage, bool]:
+        """Append a message to the loaded queue, or return the existing one with the same ID; the flag tells which"""
+        message_id = message_data.get('id') or message_data.get('message_id') or str(uuid.uuid4())
+        
+        # Check if message already exists
+        existing = self._find(queue_name, message_id)
+        if existing is not None:
+            logger.warning(f"Message {message_id} already exists in queue {queue_name}")
+            # Return existing message data
+            return existing, False
+        
+        timestamp = time.time()
+        
+        new_message = _StoredMessage(
+            id=message_id,
+            message_id=message_id,
+            message_body=message_data.get("message_body", message_data),
+            attributes=message_data.get("attributes", {}),
+            timestamp=timestamp
+        )
+        
+        self._queues[queue_name][message_id] = new_message
+        self._available[queue_name][message_id] = None
+        return new_message, True
     
     async def add_message(self, queue_name: str, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """Add message to queue"""
-        async with self._get_lock(queue_name):
-            messages = await self._load_queue(queue_name)
-            
-            message_id = message_data.get('id') or message_data.get('message_id') or str(uuid.uuid4())
-            
-            # Check if message already exists
-            if any(msg.get('id') == message_id or msg.get('message_id') == message_id for msg in messages):
-                logger.warning(f"Message {message_id} already exists in queue {queue_name}")
-                # Return existing message data
-                for msg in messages:
-                    if msg.get('id') == message_id or msg.get('message_id') == message_id:
-                        return msg
-            
-            timestamp = datetime.now(timezone.utc).isoformat()
-            
-            new_message = {
-                "id": message_id,
-                "message_id": message_id,
-                "message_body": message_data.get("message_body", message_data),
-                "attributes": message_data.get("attributes", {}),
-                "timestamp": timestamp,
-                "status": "available",
-                "receive_count": 0,
-                "receipt_handle": None,
-                "visibility_timeout_until": None
-            }
-            
-            messages.append(new_message)
-            await self._save_queue(queue_name, messages)
+        async with self._lock_for(queue_name):
+            await self._load_queue(queue_name)
+            message, added = self._insert_message(queue_name, message_data)
+            if not added:
+                return message.to_dict()
+            flushed = self._append_records(queue_name, [{"op": "add", "msg": message}])
+        
+        await self._wait_written(flushed)
+        logger.info(f"Added message {message.id} to queue {queue_name}")
+        return message.to_dict()
+    
+    async def add_messages(self, queue_name: str, messages_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add several messages to queue with a single journal write"""
+        async with self._lock_for(queue_name):
+            await self._load_queue(queue_name)
+            results: List[Dict[str, Any]] = []
+            records: List[Dict[str, Any]] = []
+            for message_data in messages_data:
+                message, added = self._insert_message(queue_name, message_data)
+                results.append(message.to_dict())
+                if added:
+                    records.append({"op": "add", "msg": message})
             
-            logger.info(f"Added message {message_id} to queue {queue_name}")
-            return new_message
+            if not records:
+                return results
+            flushed = self._append_records(queue_name, records)
+        
+        await self._wait_written(flushed)
+        logger.info(f"Added {len(records)} messages to queue {queue_name}")
+        return results
     
     async def get_messages(self, queue_name: str, limit: int = 10, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
         """Get messages from queue (non-destructive read)"""
-        async with self._get_lock(queue_name):
-            messages = await self._load_queue(queue_name)
-            
-            # Filter available messages
-            available_messages = [
-                msg for msg in messages 
-                if msg.get('status') == 'available'
-            ]
-            
-            if offset < 0:
-                offset = 0
-            start = min(offset, len(available_messages))
-            end = start + limit if limit is not None else None
-            return available_messages[start:end], len(available_messages)
+        store = await self._read_store(queue_name)
+        
+        # Filter available messages
+        available_messages = [
+            msg for msg in store.values()
+            if msg.status == 'available'
+        ]
+        
+        if offset < 0:
+            offset = 0
+        start = min(offset, len(available_messages))
+        end = start + limit if limit is not None else None
+        return [msg.to_dict() for msg in available_messages[start:end]], len(available_messages)
     
     async def receive_messages(
         self,
@@ -156,202 +563,260 @@ class JSONStorage(StorageBackend):
         only_new: bool = False
     ) -> List[Dict[str, Any]]:
         """Receive messages with visibility timeout and optional consumer filtering"""
-        async with self._get_lock(queue_name):
-            messages = await self._load_queue(queue_name)
+        async with self._lock_for(queue_name):
+            store = await self._load_queue(queue_name)
+            receipts = self._receipts[queue_name]
+            available = self._available[queue_name]
+            inflight = self._inflight[queue_name]
             
-            now = datetime.now(timezone.utc)
-            visibility_until = (now + timedelta(seconds=visibility_timeout)).isoformat()
+            # Visibility deadlines are stored as epoch seconds, so expiry is a float compare
+            now_ts = time.time()
+            visibility_until = now_ts + visibility_timeout
             received_messages = []
-            delete_indices: List[int] = []
+            taken: List[_StoredMessage] = []
+            # Messages whose state changed, journaled once each at the end
+            changed: Dict[str, _StoredMessage] = {}
             
-            # First, make expired messages available again
-            for msg in messages:
-                if (msg.get('status') == 'in_flight' and 
-                    msg.get('visibility_timeout_until')):
-                    try:
-                        timeout_dt = datetime.fromisoformat(msg['visibility_timeout_until'].replace('Z', '+00:00'))
-                        if timeout_dt <= now:
-                            msg['status'] = 'available'
-                            msg['visibility_timeout_until'] = None
-                            msg['receipt_handle'] = None
-                    except (ValueError, TypeError):
-                        # Invalid timestamp, reset to available
-                        msg['status'] = 'available'
-                        msg['visibility_timeout_until'] = None
-                        msg['receipt_handle'] = None
+            # Return expired in-flight messages to available
+            while inflight and inflight[0][0] <= now_ts:
+                timeout_ts, message_id = heapq.heappop(inflight)
+                msg = store.get(message_id)
+                if msg is None or msg.status != 'in_flight' or msg.visibility_timeout_until != timeout_ts:
+                    # Stale entry for a message deleted or received again since
+                    continue
+                msg.status = 'available'
+                msg.visibility_timeout_until = None
+                receipts.pop(msg.receipt_handle, None)
+                msg.receipt_handle = None
+                available[message_id] = None
+                changed[message_id] = msg
+            if changed:
+                # Back in FIFO (insertion) position, the order a reload rebuilds and
+                # get_messages lists; only receives that found expired messages pay for this
+                available = {message_id: None for message_id in store if message_id in available}
+                self._available[queue_name] = available
             
-            # Find available messages
-                for idx, msg in enumerate(messages):
-                    if msg.get('status') != 'available':
-                        continue
-                    if len(received_messages) >= max_messages:
-                        break
-
-                    current_receive_count = msg.get('receive_count', 0)
-                    if only_new and current_receive_count > 0:
-                        continue
-
-                    history = msg.get('delivery_history', [])
-                    if not isinstance(history, list):
-                        history = []
-
-                    if consumer_id and consumer_id in history:
-                        continue
+            # Enough handles for the most messages this call can hand out
+            receipt_handles = iter(
+                () if remove_after_receive else self._generate_receipt_handles(min(max_messages, len(available)))
+            )
+            
+            # Walk available messages in order; only consumer and only_new filtering
+            # can make this skip any
+            for message_id in available:
+                if len(received_messages) >= max_messages:
+                    break
+                
+                msg = store[message_id]
+                current_receive_count = msg.receive_count
+                if only_new and current_receive_count > 0:
+                    continue
 
-                    if consumer_id:
-                        history.append(consumer_id)
-                        msg['delivery_history'] = history
+                history = msg.delivery_history
+                if not isinstance(history, list):
+                    history = []
 
-                    msg['receive_count'] = current_receive_count + 1
+                if consumer_id and consumer_id in history:
+                    continue
 
-                    if remove_after_receive:
-                        msg_copy = msg.copy()
-                        msg_copy['status'] = 'processed'
-                        msg_copy['visibility_timeout_until'] = None
-                        msg_copy['receipt_handle'] = None
-                        received_messages.append(msg_copy)
-                        delete_indices.append(idx)
-                    else:
-                        msg['status'] = 'in_flight'
-                        msg['visibility_timeout_until'] = visibility_until
-                        msg['receipt_handle'] = self._generate_receipt_handle()
-                        received_messages.append(msg.copy())
+                if consumer_id:
+                    history.append(consumer_id)
+                    msg.delivery_history = history
 
-                if delete_indices:
-                    for i in sorted(delete_indices, reverse=True):
-                        messages.pop(i)
+                msg.receive_count = current_receive_count + 1
+                taken.append(msg)
 
-                if received_messages or delete_indices:
-                    await self._save_queue(queue_name, messages)
+                if remove_after_receive:
+                    # The message leaves the queue, so it is handed out whole
+                    msg.status = 'processed'
+                    received_messages.append(msg.to_dict())
+                else:
+                    receipt_handle = next(receipt_handles)
+                    msg.status = 'in_flight'
+                    msg.visibility_timeout_until = visibility_until
+                    msg.receipt_handle = receipt_handle
+                    receipts[receipt_handle] = message_id
+                    heapq.heappush(inflight, (visibility_until, message_id))
+                    # Only the fields callers read, rather than a copy of the whole stored dict
+                    received_messages.append({
+                        "message_id": message_id,
+                        "message_body": msg.message_body,
+                        "attributes": msg.attributes,
+                        "timestamp": msg.timestamp,
+                        "status": 'in_flight',
+                        "receipt_handle": receipt_handle,
+                        "receive_count": msg.receive_count,
+                        "visibility_timeout_until": visibility_until
+                    })
+                    changed[message_id] = msg
             
-            return received_messages
+            records: List[Dict[str, Any]] = []
+            for msg in taken:
+                del available[msg.id]
+                if remove_after_receive:
+                    self._remove(queue_name, msg)
+                    changed.pop(msg.id, None)
+                    records.append({"op": "del", "id": msg.id})
+            records.extend({"op": "put", "msg": msg} for msg in changed.values())
+
+            if not records:
+                return received_messages
+            flushed = self._append_records(queue_name, records)
+        
+        await self._wait_written(flushed)
+        return received_messages
     
     async def delete_message(self, queue_name: str, receipt_handle: str) -> bool:
         """Delete message by receipt handle"""
-        async with self._get_lock(queue_name):
-            messages = await self._load_queue(queue_name)
-            
-            # Find message with matching receipt handle
-            for i, msg in enumerate(messages):
-                if msg.get('receipt_handle') == receipt_handle:
-                    messages.pop(i)
-                    await self._save_queue(queue_name, messages)
-                    logger.info(f"Deleted message with receipt handle {receipt_handle} from queue {queue_name}")
-                    return True
+        async with self._lock_for(queue_name):
+            store = await self._load_queue(queue_name)
+            msg = store.get(self._receipts[queue_name].get(receipt_handle))
+            # The index can hold a handle overwritten since; the message's own is authoritative
+            if msg is None or msg.receipt_handle != receipt_handle:
+                return False
             
-            return False
+            self._remove(queue_name, msg)
+            flushed = self._append_records(queue_name, [{"op": "del", "id": msg.id}])
+        
+        await self._wait_written(flushed)
+        logger.info(f"Deleted message with receipt handle {receipt_handle} from queue {queue_name}")
+        return True
     
     async def delete_message_by_id(self, queue_name: str, message_id: str) -> bool:
         """Delete message by ID"""
-        async with self._get_lock(queue_name):
-            messages = await self._load_queue(queue_name)
-            
-            # Find message with matching ID
-            for i, msg in enumerate(messages):
-                if msg.get('id') == message_id or msg.get('message_id') == message_id:
-                    messages.pop(i)
-                    await self._save_queue(queue_name, messages)
-                    logger.info(f"Deleted message {message_id} from queue {queue_name}")
-                    return True
+        async with self._lock_for(queue_name):
+            await self._load_queue(queue_name)
+            msg = self._find(queue_name, message_id)
+            if msg is None:
+                return False
             
-            return False
+            self._remove(queue_name, msg)
+            flushed = self._append_records(queue_name, [{"op": "del", "id": msg.id}])
+        
+        await self._wait_written(flushed)
+        logger.info(f"Deleted message {message_id} from queue {queue_name}")
+        return True
     
     async def update_message(self, queue_name: str, message_id: str, new_message_body: Dict[str, Any]) -> bool:
         """Update message data"""
-        async with self._get_lock(queue_name):
-            messages = await self._load_queue(queue_name)
-            
-            # Find message with matching ID
-            for msg in messages:
-                if msg.get('id') == message_id or msg.get('message_id') == message_id:
-                    msg['message_body'] = new_message_body
-                    msg['timestamp'] = datetime.now(timezone.utc).isoformat()
-                    await self._save_queue(queue_name, messages)
-                    logger.info(f"Updated message {message_id} in queue {queue_name}")
-                    return True
+        async with self._lock_for(queue_name):
+            await self._load_queue(queue_name)
+            msg = self._find(queue_name, message_id)
+            if msg is None:
+                return False
             
-            return False
+            msg.message_body = new_message_body
+            msg.timestamp = time.time()
+            flushed = self._append_records(queue_name, [{"op": "put", "msg": msg}])
+        
+        await self._wait_written(flushed)
+        logger.info(f"Updated message {message_id} in queue {queue_name}")
+        return True
     
     async def get_message_by_id(self, queue_name: str, message_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific message by its ID"""
-        async with self._get_lock(queue_name):
-            messages = await self._load_queue(queue_name)
-            
-            # Find message with matching ID
-            for msg in messages:
-                if msg.get('id') == message_id or msg.get('message_id') == message_id:
-                    return msg.copy()
-            
+        await self._read_store(queue_name)
+        msg = self._find(queue_name, message_id)
+        if msg is None:
             return None
+        return {
+            "message_id": msg.id,
+            "message_body": msg.message_body,
+            "attributes": msg.attributes,
+            "timestamp": msg.timestamp,
+            "status": msg.status,
+            "receipt_handle": msg.receipt_handle,
+            "receive_count": msg.receive_count,
+            "visibility_timeout_until": msg.visibility_timeout_until
+        }
+
+    async def get_existing_message_ids(self, queue_name: str, message_ids: List[str]) -> Set[str]:
+        """Return which of the given message IDs exist in the queue"""
+        store = await self._read_store(queue_name)
+        aliases = self._aliases[queue_name]
+        return {message_id for message_id in message_ids if message_id in store or message_id in aliases}
 
     async def clear_queue(self, queue_name: str) -> int:
         """Clear all messages from queue, return count of deleted messages"""
-        async with self._get_lock(queue_name):
-            messages = await self._load_queue(queue_name)
-            count = len(messages)
-            await self._save_queue(queue_name, [])
+        async with self._lock_for(queue_name):
+            store = await self._load_queue(queue_name)
+            count = len(store)
+            await self._save_queue(queue_name, {})
             logger.info(f"Cleared {count} messages from queue {queue_name}")
             return count
     
     async def get_queue_info(self, queue_name: str) -> Dict[str, Any]:
         """Get queue information and statistics"""
-        async with self._get_lock(queue_name):
-            messages = await self._load_queue(queue_name)
-            
-            available_count = sum(1 for msg in messages if msg.get('status') == 'available')
-            in_flight_count = sum(1 for msg in messages if msg.get('status') == 'in_flight')
-            
-            queue_file = self._get_queue_file(queue_name)
-            file_size = queue_file.stat().st_size if queue_file.exists() else 0
-            
-            # Get creation time (earliest message timestamp or file creation)
-            creation_time = datetime.now(timezone.utc)
-            if messages:
-                timestamps = []
-                for msg in messages:
-                    try:
-                        if isinstance(msg.get('timestamp'), str):
-                            ts = datetime.fromisoformat(msg['timestamp'].replace('Z', '+00:00'))
-                            timestamps.append(ts)
-                    except (ValueError, TypeError):
-                        continue
-                if timestamps:
-                    creation_time = min(timestamps)
-            elif queue_file.exists():
-                creation_time = datetime.fromtimestamp(queue_file.stat().st_ctime, tz=timezone.utc)
-            
-            # Get last modification time
-            last_modified = creation_time
-            if messages:
-                timestamps = []
-                for msg in messages:
-                    try:
-                        if isinstance(msg.get('timestamp'), str):
-                            ts = datetime.fromisoformat(msg['timestamp'].replace('Z', '+00:00'))
-                            timestamps.append(ts)
-                    except (ValueError, TypeError):
-                        continue
-                if timestamps:
-                    last_modified = max(timestamps)
-            elif queue_file.exists():
-                last_modified = datetime.fromtimestamp(queue_file.stat().st_mtime, tz=timezone.utc)
+        store = await self._read_store(queue_name)
+        
+        file_size = self._live_bytes.get(queue_name, 0) + self._log_bytes.get(queue_name, 0)
+        
+        # One pass for the status counts and the earliest/latest message timestamps
+        available_count = in_flight_count = 0
+        min_ts: Optional[float] = None
+        max_ts: Optional[float] = None
+        for msg in store.values():
+            status = msg.status
+            if status == 'available':
+                available_count += 1
+            elif status == 'in_flight':
+                in_flight_count += 1
             
-            return {
-                "exists": True,
-                "queue_name": queue_name,
-                "total_messages": len(messages),
-                "available_messages": available_count,
-                "in_flight_messages": in_flight_count,
-                "queue_size_bytes": file_size,
-                "created_at": creation_time.isoformat(),
-                "last_modified": last_modified.isoformat(),
-                "attributes": {}
-            }
+            ts = msg.timestamp
+            if ts is None:
+                continue
+            if min_ts is None or ts < min_ts:
+                min_ts = ts
+            if max_ts is None or ts > max_ts:
+                max_ts = ts
+        
+        # Creation and last modification time: message timestamps, else the snapshot or
+        # journal file's, else when this process first saw the queue. Never the current
+        # time, so the queue info (and the ETag hashed from it) stays stable while idle
+        if min_ts is not None:
+            creation_time = datetime.fromtimestamp(min_ts, tz=timezone.utc)
+            last_modified = datetime.fromtimestamp(max_ts, tz=timezone.utc)
+        else:
+            for path in (self._get_queue_file(queue_name), self._get_log_file(queue_name)):
+                # One stat call both checks for the file and reads its times
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                creation_time = datetime.fromtimestamp(stat.st_ctime, tz=timezone.utc)
+                last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+                break
+            else:
+                creation_time = last_modified = self._first_seen.setdefault(
+                    queue_name, datetime.now(timezone.utc)
+                )
+        
+        return {
+            "exists": True,
+            "queue_name": queue_name,
+            "total_messages": len(store),
+            "available_messages": available_count,
+            "in_flight_messages": in_flight_count,
+            "queue_size_bytes": file_size,
+            "created_at": creation_time.isoformat(),
+            "last_modified": last_modified.isoformat(),
+            "attributes": {}
+        }
     
     async def list_queues(self) -> List[str]:
         """List all available queues"""
-        queue_files = self.data_dir.glob("*.json")
-        return [f.stem for f in queue_files]
+        # Creating or removing a file bumps the directory mtime, so one stat replaces the scan
+        mtime = self.data_dir.stat().st_mtime_ns
+        if self._queue_names is None or mtime != self._queue_names_mtime:
+            # A queue created since the last compaction only has a journal so far
+            queue_names = {f.stem for f in self.data_dir.glob("*.json")}
+            queue_names.update(f.stem for f in self.data_dir.glob("*.log"))
+            self._queue_names = list(queue_names)
+            self._queue_names_mtime = mtime
+        # A new queue whose first records are still buffered has no file yet
+        return list(self._queue_names) + [
+            queue_name for queue_name in self._pending if queue_name not in self._queue_names
+        ]
     
     async def health_check(self, queue_name: Optional[str] = None) -> bool:
         """Check if the storage backend is healthy"""
@@ -362,8 +827,7 @@ class JSONStorage(StorageBackend):
             
             # If queue_name is provided, check if it's accessible
             if queue_name:
-                async with self._get_lock(queue_name):
-                    await self._load_queue(queue_name)
+                await self._read_store(queue_name)
             
             return True
         except Exception as e:
@@ -1,22 +1,44 @@
 import sqlite3
-import json
 import time
 import uuid
 import os
-from typing import List, Dict, Any, Optional, Tuple
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set, Tuple, AsyncIterator
 from datetime import datetime, timedelta
 import aiosqlite
 import asyncio
+import orjson
 
 from .base import StorageBackend
 
 
+def _dumps(value: Any) -> str:
+    """Encode a JSON column value; kept as TEXT so SQLite's JSON functions still apply"""
+    return orjson.dumps(value).decode()
+
+
 class SQLiteStorage(StorageBackend):
     """SQLite storage backend for PyQueue with async operations"""
     
+    # Stay well below SQLite's bound-parameter limit when expanding IN (...) lists
+    MAX_IN_PARAMS = 500
+    
+    # Read-only connections kept open next to the single writer; WAL lets them read during writes
+    READER_POOL_SIZE = min(32, (os.cpu_count() or 1) * 4)
+    
+    # Applied to every pooled connection
+    CONNECTION_PRAGMAS = (
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA busy_timeout=5000",
+    )
+    
     def __init__(self, db_path: str):
         super().__init__()
         self.db_path = db_path
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: Optional[asyncio.Queue] = None
         self._ensure_directory()
     
     def _ensure_directory(self):
@@ -24,8 +46,15 @@ class SQLiteStorage(StorageBackend):
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
     
     async def initialize(self) -> None:
-        """Initialize SQLite database with required tables"""
-        async with aiosqlite.connect(self.db_path) as db:
+        """Initialize SQLite database with required tables and open the connection pool"""
+        self._writer = await self._connect(self.db_path)
+        await self._writer.execute("PRAGMA journal_mode=WAL")
+        await self._writer.execute("PRAGMA synchronous=NORMAL")
+        # 64 MiB page cache for the writer only; readers are served through mmap,
+        # and the setting is per connection, so it would multiply across the pool
+        await self._writer.execute("PRAGMA cache_size=-65536")
+        
+        async with self._write_connection() as db:
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS queues (
                     name TEXT PRIMARY KEY,
@@ -45,10 +74,13 @@ class SQLiteStorage(StorageBackend):
                     visibility_timeout_until TEXT NULL,
                     receipt_handle TEXT NULL,
                     receive_count INTEGER DEFAULT 0,
+                    delivery_history TEXT DEFAULT '[]',
                     FOREIGN KEY (queue_name) REFERENCES queues(name)
                 )
             """)
             
+            await self._migrate_delivery_history(db)
+            
             # Create indexes for better performance
             await db.execute("""
                 CREATE INDEX IF NOT EXISTS idx_messages_queue_status 
@@ -60,60 +92,144 @@ class SQLiteStorage(StorageBackend):
                 ON messages(visibility_timeout_until)
             """)
             
+            # Receives scan only the small available subset, already in timestamp order
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_messages_available
+                ON messages(queue_name, timestamp) WHERE status = 'available'
+            """)
+            
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_messages_receipt
+                ON messages(receipt_handle)
+            """)
+            
             await db.commit()
+        
+        # Readers open the database read-only, after the schema exists
+        reader_uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        self._readers = asyncio.Queue()
+        for _ in range(self.READER_POOL_SIZE):
+            self._readers.put_nowait(await self._connect(reader_uri, uri=True))
+    
+    async def close(self) -> None:
+        """Close the writer and all pooled reader connections"""
+        if self._readers is not None:
+            while not self._readers.empty():
+                await self._readers.get_nowait().close()
+            self._readers = None
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+    
+    async def _connect(self, database: str, **kwargs) -> aiosqlite.Connection:
+        """Open a pooled connection with the shared pragmas applied"""
+        db = await aiosqlite.connect(database, **kwargs)
+        for pragma in self.CONNECTION_PRAGMAS:
+            await db.execute(pragma)
+        return db
+    
+    @asynccontextmanager
+    async def _write_connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Yield the writer connection, serialized by the backend lock"""
+        # Deliberately one lock for all queues rather than _lock_for(queue_name): every
+        # write shares this connection, so transactions on different queues would interleave
+        async with self.lock:
+            try:
+                yield self._writer
+            except BaseException:
+                # The writer outlives the call, so drop any half-done transaction
+                await self._writer.rollback()
+                raise
+    
+    @asynccontextmanager
+    async def _read_connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection from the pool"""
+        db = await self._readers.get()
+        try:
+            yield db
+        finally:
+            self._readers.put_nowait(db)
     
     async def add_message(self, queue_name: str, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """Add message to queue"""
-        async with self.lock:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Ensure queue exists
-                await self._ensure_queue_exists(db, queue_name)
-                
-                message_id = str(uuid.uuid4())
-                timestamp = datetime.now().isoformat()
-                
-                # Extract message body and attributes
-                message_body = message_data.get("message_body", message_data)
-                attributes = message_data.get("attributes", {})
-                
-                await db.execute("""
-                    INSERT INTO messages (
-                        id, queue_name, message_body, attributes, timestamp, status
-                    ) VALUES (?, ?, ?, ?, ?, 'available')
-                """, (
-                    message_id,
-                    queue_name,
-                    json.dumps(message_body),
-                    json.dumps(attributes),
-                    timestamp
-                ))
-                
-                await db.commit()
-                
-                return {
-                    "message_id": message_id,
-                    "message_body": message_body,
-                    "attributes": attributes,
+        async with self._write_connection() as db:
+            # Ensure queue exists
+            await self._ensure_queue_exists(db, queue_name)
+            
+            message_id = str(uuid.uuid4())
+            timestamp = datetime.now().isoformat()
+            
+            # Extract message body and attributes
+            message_body = message_data.get("message_body", message_data)
+            attributes = message_data.get("attributes", {})
+            
+            await db.execute("""
+                INSERT INTO messages (
+                    id, queue_name, message_body, attributes, timestamp, status
+                ) VALUES (?, ?, ?, ?, ?, 'available')
+            """, (
+                message_id,
+                queue_name,
+                _dumps(message_body),
+                _dumps(attributes),
+                timestamp
+            ))
+            
+            await db.commit()
+            
+            return {
+                "message_id": message_id,
+                "message_body": message_body,
+                "attributes": attributes,
+                "timestamp": timestamp,
+                "status": "available"
+            }
+    
+    async def add_messages(self, queue_name: str, messages_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add several messages to queue in a single transaction"""
+        async with self._write_connection() as db:
+            await self._ensure_queue_exists(db, queue_name)
+            
+            timestamp = datetime.now().isoformat()
+            messages = [
+                {
+                    "message_id": str(uuid.uuid4()),
+                    "message_body": message_data.get("message_body", message_data),
+                    "attributes": message_data.get("attributes", {}),
                     "timestamp": timestamp,
                     "status": "available"
                 }
+                for message_data in messages_data
+            ]
+            
+            # One statement and one commit for the whole batch
+            await db.executemany("""
+                INSERT INTO messages (
+                    id, queue_name, message_body, attributes, timestamp, status
+                ) VALUES (?, ?, ?, ?, ?, 'available')
+            """, [
+                (
+                    message["message_id"],
+                    queue_name,
+                    _dumps(message["message_body"]),
+                    _dumps(message["attributes"]),
+                    timestamp
+                )
+                for message in messages
+            ])
+            
+            await db.commit()
+            return messages
     
     async def get_messages(self, queue_name: str, limit: int = 10, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
         """Get messages from queue (non-destructive read)"""
         if offset < 0:
             offset = 0
-        async with aiosqlite.connect(self.db_path) as db:
-            count_cursor = await db.execute("""
-                SELECT COUNT(*)
-                FROM messages
-                WHERE queue_name = ?
-            """, (queue_name,))
-            total_row = await count_cursor.fetchone()
-            total = total_row[0] if total_row else 0
-            await count_cursor.close()
-
+        async with self._read_connection() as db:
+            # The window count rides along with the page, so the total needs no extra query
             cursor = await db.execute("""
-                SELECT id, message_body, attributes, timestamp, status, receive_count
+                SELECT id, message_body, attributes, timestamp, status, receive_count,
+                       COUNT(*) OVER () AS total
                 FROM messages 
                 WHERE queue_name = ? 
                 ORDER BY timestamp ASC
@@ -121,21 +237,58 @@ class SQLiteStorage(StorageBackend):
             """, (queue_name, limit, offset))
             
             rows = await cursor.fetchall()
+            await cursor.close()
             messages = []
             
             for row in rows:
                 messages.append({
                     "message_id": row[0],
-                    "message_body": json.loads(row[1]),
-                    "attributes": json.loads(row[2]),
+                    "message_body": orjson.loads(row[1]),
+                    "attributes": orjson.loads(row[2]),
                     "timestamp": row[3],
                     "status": row[4],
                     "receive_count": row[5]
                 })
             
-            await cursor.close()
+            if rows:
+                total = rows[0][6]
+            elif offset or not limit:
+                # Paged past the end (or asked for no rows): nothing carries the count
+                count_cursor = await db.execute("""
+                    SELECT COUNT(*)
+                    FROM messages
+                    WHERE queue_name = ?
+                """, (queue_name,))
+                total_row = await count_cursor.fetchone()
+                total = total_row[0] if total_row else 0
+                await count_cursor.close()
+            else:
+                total = 0
+            
             return messages, total
     
+    async def iter_messages(self, queue_name: str, limit: int = 10, offset: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """Stream messages from queue straight off the database cursor"""
+        if offset < 0:
+            offset = 0
+        async with self._read_connection() as db:
+            async with db.execute("""
+                SELECT id, message_body, attributes, timestamp, status, receive_count
+                FROM messages 
+                WHERE queue_name = ? 
+                ORDER BY timestamp ASC
+                LIMIT ? OFFSET ?
+            """, (queue_name, limit, offset)) as cursor:
+                async for row in cursor:
+                    yield {
+                        "message_id": row[0],
+                        "message_body": orjson.loads(row[1]),
+                        "attributes": orjson.loads(row[2]),
+                        "timestamp": row[3],
+                        "status": row[4],
+                        "receive_count": row[5]
+                    }
+    
     async def receive_messages(
         self,
         queue_name: str,
@@ -146,119 +299,100 @@ class SQLiteStorage(StorageBackend):
         only_new: bool = False
     ) -> List[Dict[str, Any]]:
         """Receive messages with visibility timeout and optional consumer filtering"""
-        async with self.lock:
-            async with aiosqlite.connect(self.db_path) as db:
-                now = datetime.now().isoformat()
-                
-                # First, make expired messages available again
-                await db.execute("""
+        async with self._write_connection() as db:
+            now = datetime.now().isoformat()
+            
+            # First, make expired messages available again
+            await db.execute("""
+                UPDATE messages 
+                SET status = 'available', visibility_timeout_until = NULL, receipt_handle = NULL
+                WHERE queue_name = ? AND status = 'in_flight' 
+                AND visibility_timeout_until < ?
+            """, (queue_name, now))
+            
+            # Claim messages with a single UPDATE/DELETE ... RETURNING over this selection,
+            # with the only_new / consumer filters applied by SQLite
+            candidates = """
+                SELECT id FROM messages
+                WHERE queue_name = ? AND status = 'available'
+                AND (? = 0 OR receive_count = 0)
+                AND (? IS NULL OR NOT EXISTS (
+                    SELECT 1 FROM json_each(messages.delivery_history) WHERE value = ?
+                ))
+                ORDER BY timestamp ASC
+                LIMIT ?
+            """
+            params = (queue_name, only_new, consumer_id, consumer_id, max_messages)
+            
+            if remove_after_receive:
+                cursor = await db.execute(f"""
+                    DELETE FROM messages
+                    WHERE id IN ({candidates})
+                    RETURNING id, message_body, attributes, timestamp, receive_count + 1, NULL
+                """, params)
+                status_value = 'processed'
+                visibility_value = None
+            else:
+                visibility_value = (datetime.now() + timedelta(seconds=visibility_timeout)).isoformat()
+                cursor = await db.execute(f"""
                     UPDATE messages 
-                    SET status = 'available', visibility_timeout_until = NULL, receipt_handle = NULL
-                    WHERE queue_name = ? AND status = 'in_flight' 
-                    AND visibility_timeout_until < ?
-                """, (queue_name, now))
-                
-                # Get available messages
-                cursor = await db.execute("""
-                    SELECT id, message_body, attributes, timestamp, receive_count
-                    FROM messages 
-                    WHERE queue_name = ? AND status = 'available'
-                    ORDER BY timestamp ASC
-                """, (queue_name,))
-                
-                rows = await cursor.fetchall()
-                messages: List[Dict[str, Any]] = []
-                
-                if rows:
-                    visibility_until = (datetime.now() + timedelta(seconds=visibility_timeout)).isoformat()
-                    
-                    for row in rows:
-                        if len(messages) >= max_messages:
-                            break
-
-                        message_id = row[0]
-                        body = json.loads(row[1])
-                        attributes = json.loads(row[2]) if row[2] else {}
-                        history = attributes.get("delivery_history", [])
-                        if not isinstance(history, list):
-                            history = []
-
-                        current_receive_count = row[4]
-
-                        if only_new and current_receive_count > 0:
-                            continue
-                        if consumer_id and consumer_id in history:
-                            continue
-
-                        if consumer_id:
-                            history.append(consumer_id)
-                            attributes["delivery_history"] = history
-
-                        new_receive_count = row[4] + 1
-
-                        if remove_after_receive:
-                            await db.execute(
-                                "DELETE FROM messages WHERE id = ?",
-                                new_receive_count = current_receive_count + 1
-                            )
-                            status_value = 'processed'
-                            receipt_handle = None
-                            visibility_value = None
-                        else:
-                            receipt_handle = str(uuid.uuid4())
-                            await db.execute("""
-                                UPDATE messages 
-                                SET status = 'in_flight', 
-                                    visibility_timeout_until = ?,
-                                    receipt_handle = ?,
-                                    receive_count = ?,
-                                    attributes = ?
-                                WHERE id = ?
-                            """, (visibility_until, receipt_handle, new_receive_count, json.dumps(attributes), message_id))
-                            status_value = 'in_flight'
-                            visibility_value = visibility_until
-                        
-                        messages.append({
-                            "message_id": message_id,
-                            "message_body": body,
-                            "attributes": attributes,
-                            "timestamp": row[3],
-                            "receipt_handle": receipt_handle,
-                            "receive_count": new_receive_count,
-                            "status": status_value,
-                            "visibility_timeout_until": visibility_value
-                        })
-                
-                await db.commit()
-                return messages
+                    SET status = 'in_flight', 
+                        visibility_timeout_until = ?,
+                        receipt_handle = lower(hex(randomblob(16))),
+                        receive_count = receive_count + 1,
+                        delivery_history = CASE WHEN ? IS NULL THEN delivery_history
+                            ELSE json_insert(COALESCE(delivery_history, '[]'), '$[#]', ?) END
+                    WHERE id IN ({candidates})
+                    RETURNING id, message_body, attributes, timestamp, receive_count, receipt_handle
+                """, (visibility_value, consumer_id, consumer_id, *params))
+                status_value = 'in_flight'
+            
+            rows = await cursor.fetchall()
+            await cursor.close()
+            # RETURNING yields rows in no particular order
+            rows.sort(key=lambda row: row[3])
+            messages = [
+                {
+                    "message_id": row[0],
+                    "message_body": orjson.loads(row[1]),
+                    "attributes": orjson.loads(row[2]) if row[2] else {},
+                    "timestamp": row[3],
+                    "receipt_handle": row[5],
+                    "receive_count": row[4],
+                    "status": status_value,
+                    "visibility_timeout_until": visibility_value
+                }
+                for row in rows
+            ]
+            
+            await db.commit()
+            return messages
     
     async def delete_message(self, queue_name: str, receipt_handle: str) -> bool:
         """Delete message by receipt handle"""
-        async with self.lock:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute("""
-                    DELETE FROM messages 
-                    WHERE queue_name = ? AND receipt_handle = ?
-                """, (queue_name, receipt_handle))
-                
-                await db.commit()
-                return cursor.rowcount > 0
+        async with self._write_connection() as db:
+            cursor = await db.execute("""
+                DELETE FROM messages 
+                WHERE queue_name = ? AND receipt_handle = ?
+            """, (queue_name, receipt_handle))
+            
+            await db.commit()
+            return cursor.rowcount > 0
     
     async def delete_message_by_id(self, queue_name: str, message_id: str) -> bool:
         """Delete message by ID"""
-        async with self.lock:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute("""
-                    DELETE FROM messages 
-                    WHERE queue_name = ? AND id = ?
-                """, (queue_name, message_id))
-                
-                await db.commit()
-                return cursor.rowcount > 0
+        async with self._write_connection() as db:
+            cursor = await db.execute("""
+                DELETE FROM messages 
+                WHERE queue_name = ? AND id = ?
+            """, (queue_name, message_id))
+            
+            await db.commit()
+            return cursor.rowcount > 0
     
     async def get_message_by_id(self, queue_name: str, message_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific message by its ID"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._read_connection() as db:
             cursor = await db.execute("""
                 SELECT id, message_body, attributes, timestamp, status, receive_count
                 FROM messages 
@@ -271,92 +405,126 @@ class SQLiteStorage(StorageBackend):
             if row:
                 return {
                     "message_id": row[0],
-                    "message_body": json.loads(row[1]),
-                    "attributes": json.loads(row[2]),
+                    "message_body": orjson.loads(row[1]),
+                    "attributes": orjson.loads(row[2]),
                     "timestamp": row[3],
                     "status": row[4],
                     "receive_count": row[5]
                 }
             return None
+    
+    async def get_existing_message_ids(self, queue_name: str, message_ids: List[str]) -> Set[str]:
+        """Return which of the given message IDs exist in the queue, with one query per chunk of IDs"""
+        existing: Set[str] = set()
+        async with self._read_connection() as db:
+            for start in range(0, len(message_ids), self.MAX_IN_PARAMS):
+                chunk = message_ids[start:start + self.MAX_IN_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = await db.execute(f"""
+                    SELECT id FROM messages
+                    WHERE queue_name = ? AND id IN ({placeholders})
+                """, (queue_name, *chunk))
+                existing.update(row[0] for row in await cursor.fetchall())
+                await cursor.close()
+        return existing
 
 
     async def update_message(self, queue_name: str, message_id: str, new_message_body: Dict[str, Any]) -> bool:
         """Update message data"""
-        async with self.lock:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute("""
-                    UPDATE messages 
-                    SET message_body = ?
-                    WHERE queue_name = ? AND id = ?
-                """, (json.dumps(new_message_body), queue_name, message_id))
-                
-                await db.commit()
-                return cursor.rowcount > 0
+        async with self._write_connection() as db:
+            cursor = await db.execute("""
+                UPDATE messages 
+                SET message_body = ?
+                WHERE queue_name = ? AND id = ?
+            """, (_dumps(new_message_body), queue_name, message_id))
+            
+            await db.commit()
+            return cursor.rowcount > 0
     
     async def clear_queue(self, queue_name: str) -> int:
         """Clear all messages from queue, return count of deleted messages"""
-        async with self.lock:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute("""
-                    DELETE FROM messages WHERE queue_name = ?
-                """, (queue_name,))
-                
-                await db.commit()
-                return cursor.rowcount
-    
-    async def get_queue_info(self, queue_name: str) -> Dict[str, Any]:
-        """Get queue information and statistics"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Get queue metadata
-            cursor = await db.execute("""
-                SELECT created_at, attributes FROM queues WHERE name = ?
-            """, (queue_name,))
-            
-            queue_row = await cursor.fetchone()
-            if not queue_row:
-                return {
-                    "exists": False,
-                    "queue_name": queue_name
-                }
-            
-            # Get message counts
+        async with self._write_connection() as db:
             cursor = await db.execute("""
-                SELECT 
-                    COUNT(*) as total_messages,
-                    COUNT(CASE WHEN status = 'available' THEN 1 END) as available_messages,
-                    COUNT(CASE WHEN status = 'in_flight' THEN 1 END) as in_flight_messages
-                FROM messages 
-                WHERE queue_name = ?
+                DELETE FROM messages WHERE queue_name = ?
             """, (queue_name,))
             
-            counts = await cursor.fetchone()
-            
-            return {
-                "exists": True,
-                "queue_name": queue_name,
-                "created_at": queue_row[0],
-                "attributes": json.loads(queue_row[1]),
-                "total_messages": counts[0],
-                "available_messages": counts[1],
-                "in_flight_messages": counts[2]
-            }
+            await db.commit()
+            return cursor.rowcount
+    
+    async def get_queue_info(self, queue_name: str) -> Dict[str, Any]:
+        """Get queue information and statistics"""
+        # One grouped query reads the queue row and aggregates its message counts together
+        infos = await self.get_queue_infos([queue_name])
+        return infos[queue_name]
+    
+    async def get_queue_infos(self, queue_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get information for several queues with one grouped query per chunk of names"""
+        infos: Dict[str, Dict[str, Any]] = {
+            queue_name: {"exists": False, "queue_name": queue_name} for queue_name in queue_names
+        }
+        async with self._read_connection() as db:
+            for start in range(0, len(queue_names), self.MAX_IN_PARAMS):
+                chunk = queue_names[start:start + self.MAX_IN_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = await db.execute(f"""
+                    SELECT 
+                        q.name,
+                        q.created_at,
+                        q.attributes,
+                        COUNT(m.id) as total_messages,
+                        COUNT(CASE WHEN m.status = 'available' THEN 1 END) as available_messages,
+                        COUNT(CASE WHEN m.status = 'in_flight' THEN 1 END) as in_flight_messages
+                    FROM queues q
+                    LEFT JOIN messages m ON m.queue_name = q.name
+                    WHERE q.name IN ({placeholders})
+                    GROUP BY q.name
+                """, chunk)
+                
+                for row in await cursor.fetchall():
+                    infos[row[0]] = {
+                        "exists": True,
+                        "queue_name": row[0],
+                        "created_at": row[1],
+                        "attributes": orjson.loads(row[2]),
+                        "total_messages": row[3],
+                        "available_messages": row[4],
+                        "in_flight_messages": row[5]
+                    }
+                await cursor.close()
+        return infos
     
     async def list_queues(self) -> List[str]:
         """List all available queues"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._read_connection() as db:
             cursor = await db.execute("SELECT name FROM queues ORDER BY name")
             rows = await cursor.fetchall()
             return [row[0] for row in rows]
     
     async def health_check(self, queue_name: Optional[str] = None) -> bool:
         """Check if the storage backend is healthy"""
+        if self._readers is None:
+            return False
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._read_connection() as db:
                 await db.execute("SELECT 1")
                 return True
         except Exception:
             return False
     
+    async def _migrate_delivery_history(self, db: aiosqlite.Connection):
+        """Add the delivery_history column to databases created before it existed"""
+        cursor = await db.execute("PRAGMA table_info(messages)")
+        columns = {row[1] for row in await cursor.fetchall()}
+        if "delivery_history" in columns:
+            return
+        await db.execute("ALTER TABLE messages ADD COLUMN delivery_history TEXT DEFAULT '[]'")
+        # Older rows kept the consumer list inside their attributes
+        await db.execute("""
+            UPDATE messages
+            SET delivery_history = json_extract(attributes, '$.delivery_history')
+            WHERE json_valid(attributes) AND json_type(attributes, '$.delivery_history') = 'array'
+        """)
+    
     async def _ensure_queue_exists(self, db: aiosqlite.Connection, queue_name: str):
         """Ensure a queue exists in the database"""
         cursor = await db.execute("SELECT 1 FROM queues WHERE name = ?", (queue_name,))
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer, field_validator, model_validator
 from typing import Dict, Any, Optional, List, Union
 from datetime import datetime
 from enum import Enum
+import msgspec
 
 class MessageStatus(str, Enum):
     """Message status enumeration"""
@@ -19,16 +20,31 @@ class QueueMessage(BaseModel):
     receipt_handle: Optional[str] = Field(None, description="Handle for message operations")
     receive_count: int = Field(default=0, description="Number of times message has been received")
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    @field_serializer("timestamp", "visibility_timeout", when_used="json-unless-none")
+    def _serialize_datetime(self, value: datetime) -> str:
+        return value.isoformat()
 
 class MessageRequest(BaseModel):
     """Request model for adding messages"""
     id: Optional[str] = Field(None, description="Optional message ID")
     message_body: Union[Dict[Any, Any], str] = Field(..., description="Message content (can be dict or string)")
     timestamp: Optional[str] = Field(None, description="Optional timestamp (ISO format string)")
+    
+    @field_validator("message_body", mode="before")
+    @classmethod
+    def _coerce_message_body(cls, value: Any) -> Any:
+        """Wrap plain string messages as {"content": ...} for storage"""
+        return {"content": value} if type(value) is str else value
+
+class MessageRequestStruct(msgspec.Struct):
+    """msgspec mirror of MessageRequest, decoded straight from request bytes on the add-message hot path"""
+    message_body: Union[Dict[str, Any], str]
+    id: Optional[str] = None
+    timestamp: Optional[str] = None
+    
+    def __post_init__(self):
+        if type(self.message_body) is str:
+            self.message_body = {"content": self.message_body}
 
 class MessageResponse(BaseModel):
     """Response model for message operations"""
@@ -74,4 +90,36 @@ class CheckExistenceRequest(BaseModel):
 
 class CheckExistenceResponse(BaseModel):
     """Response model for existence check"""
-    existing_ids: List[str] = Field(..., description="List of IDs that were found in the queue")
\ No newline at end of file
+    existing_ids: List[str] = Field(..., description="List of IDs that were found in the queue")
+
+MAX_BATCH_SIZE = 1000
+
+class BatchMessageRequest(BaseModel):
+    """Request model for adding multiple messages in one call"""
+    operations: List[MessageRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Messages to add")
+
+class BatchDeleteRequest(BaseModel):
+    """Request model for deleting multiple messages in one call"""
+    message_ids: List[str] = Field(default_factory=list, max_length=MAX_BATCH_SIZE, description="IDs of messages to delete")
+    receipt_handles: List[str] = Field(default_factory=list, max_length=MAX_BATCH_SIZE, description="Receipt handles of messages to delete")
+
+    @model_validator(mode="after")
+    def _check_size(self) -> "BatchDeleteRequest":
+        total = len(self.message_ids) + len(self.receipt_handles)
+        if not 1 <= total <= MAX_BATCH_SIZE:
+            raise ValueError(f"Batch must contain between 1 and {MAX_BATCH_SIZE} items")
+        return self
+
+class BatchItemResult(BaseModel):
+    """Outcome of a single operation within a batch"""
+    id: Optional[str] = Field(None, description="Message ID or receipt handle the operation targeted")
+    status: str = Field(..., description="Operation status (success or error)")
+    result: Optional[Any] = Field(None, description="Operation result on success")
+    error: Optional[str] = Field(None, description="Error message on failure")
+
+class BatchResponse(BaseModel):
+    """Response model for batch operations"""
+    succeeded: int = Field(..., description="Number of successful operations")
+    failed: int = Field(..., description="Number of failed operations")
+    total: int = Field(..., description="Total number of operations in the batch")
+    results: List[BatchItemResult] = Field(..., description="Per-item results, in request order")
@@ -1,13 +1,20 @@
+import hashlib
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+import orjson
+from typing import Dict, List, Optional, Any, Tuple, AsyncIterator
 from datetime import datetime, timezone
 
-from app.models.queue import QueueMessage, MessageStatus, QueueInfo
+from app.models.queue import MessageStatus, QueueInfo
 from app.core.config import settings
-from app.core.storage import create_storage_backend, StorageBackend
+from app.core.storage import create_storage_backend, StorageBackend, StorageError
 
 logger = logging.getLogger(__name__)
 
+# Storage status strings resolved once to their wire value, instead of chained compares
+# per message; anything unrecognized reads as available
+_WIRE_STATUSES = {status.value: status.value for status in MessageStatus}
+_AVAILABLE_VALUE = MessageStatus.AVAILABLE.value
+
 
 class QueueService:
     """Service for managing queue operations with configurable storage backends"""
@@ -26,6 +33,10 @@ class QueueService:
         """Initialize the storage backend"""
         await self.storage.initialize()
     
+    async def close(self):
+        """Close the storage backend"""
+        await self.storage.close()
+    
     async def add_message(self, queue_name: str, message_body: Dict, message_id: Optional[str] = None) -> str:
         """Add a message to the queue"""
         message_data = {
@@ -40,11 +51,31 @@ class QueueService:
         result = await self.storage.add_message(queue_name, message_data)
         return result.get("message_id") or result.get("id")
     
-    async def get_messages(self, queue_name: str, limit: int = 10, offset: int = 0) -> Tuple[List[QueueMessage], int]:
-        """Get messages from the queue (without making them invisible) with pagination support"""
+    async def add_messages(self, queue_name: str, messages: List[Tuple[Dict, Optional[str]]]) -> List[str]:
+        """Add several (message_body, message_id) pairs to the queue in one storage call"""
+        messages_data = []
+        for message_body, message_id in messages:
+            message_data = {
+                "message_body": message_body,
+                "attributes": {},
+            }
+            if message_id:
+                message_data["id"] = message_id
+                message_data["message_id"] = message_id
+            messages_data.append(message_data)
+        
+        results = await self.storage.add_messages(queue_name, messages_data)
+        return [result.get("message_id") or result.get("id") for result in results]
+    
+    async def get_messages(self, queue_name: str, limit: int = 10, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Get messages from the queue (without making them invisible) with pagination support, as JSON-ready dicts shaped like QueueMessage"""
         messages_data, total = await self.storage.get_messages(queue_name, limit, offset)
-        messages = [self._convert_to_queue_message(msg_data) for msg_data in messages_data]
-        return messages, total
+        return [self._convert_to_wire_message(msg_data) for msg_data in messages_data], total
+    
+    async def iter_messages(self, queue_name: str, limit: int = 10, offset: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """Stream messages as plain dicts shaped like QueueMessage, skipping model validation"""
+        async for msg_data in self.storage.iter_messages(queue_name, limit, offset):
+            yield self._convert_to_wire_message(msg_data)
     
     async def receive_messages(
         self,
@@ -54,8 +85,8 @@ class QueueService:
         consumer_id: Optional[str] = None,
         remove_after_receive: bool = False,
         only_new: bool = False
-    ) -> List[QueueMessage]:
-        """Receive messages with optional consumer filtering, auto removal, and new-message filtering"""
+    ) -> List[Dict[str, Any]]:
+        """Receive messages with optional consumer filtering, auto removal, and new-message filtering, as JSON-ready dicts"""
         messages_data = await self.storage.receive_messages(
             queue_name,
             max_messages,
@@ -64,7 +95,7 @@ class QueueService:
             remove_after_receive=remove_after_receive,
             only_new=only_new
         )
-        return [self._convert_to_queue_message(msg_data) for msg_data in messages_data]
+        return [self._convert_to_wire_message(msg_data) for msg_data in messages_data]
     
     async def delete_message(self, queue_name: str, receipt_handle: str) -> bool:
         """Delete a message using receipt handle"""
@@ -82,27 +113,51 @@ class QueueService:
         """Clear all messages from the queue"""
         return await self.storage.clear_queue(queue_name)
     
-    async def get_message_by_id(self, queue_name: str, message_id: str) -> Optional[QueueMessage]:
-        """Get a specific message by its ID"""
+    async def get_message_by_id(self, queue_name: str, message_id: str) -> Optional[Dict[str, Any]]:
+        """Get a specific message by its ID, as a JSON-ready dict"""
         msg_data = await self.storage.get_message_by_id(queue_name, message_id)
         if msg_data:
-            return self._convert_to_queue_message(msg_data)
+            return self._convert_to_wire_message(msg_data)
         return None
     
     async def check_messages_existence(self, queue_name: str, message_ids: List[str]) -> List[str]:
         """Check which messages from the list exist in the queue"""
-        # Optimized implementation could rely on storage backend specific method
-        # For now, we iterate, but it happens locally on the server (fast)
-        existing_ids = []
-        for msg_id in message_ids:
-            if await self.storage.get_message_by_id(queue_name, msg_id):
-                existing_ids.append(msg_id)
-        return existing_ids
+        existing = await self.storage.get_existing_message_ids(queue_name, message_ids)
+        # Keep the caller's order
+        return [msg_id for msg_id in message_ids if msg_id in existing]
 
     async def get_queue_info(self, queue_name: str) -> QueueInfo:
         """Get information about the queue"""
         info_data = await self.storage.get_queue_info(queue_name)
-        
+        return self._convert_to_queue_info(queue_name, info_data)
+    
+    async def get_queue_info_with_etag(self, queue_name: str) -> Tuple[QueueInfo, str]:
+        """Get information about the queue, with an ETag derived from the storage state it reflects"""
+        info_data = await self.storage.get_queue_info(queue_name)
+        # Hashing storage state rather than per-process counters keeps tags consistent
+        # across workers. Weak, because fields storage doesn't track (SQLite's
+        # last_modified) are filled in per request
+        digest = hashlib.blake2b(orjson.dumps(info_data, option=orjson.OPT_SORT_KEYS), digest_size=8).hexdigest()
+        return self._convert_to_queue_info(queue_name, info_data), f'W/"{digest}"'
+    
+    async def get_queue_infos(self, queue_names: List[str]) -> Dict[str, QueueInfo]:
+        """Get information about several queues with a single storage call"""
+        infos_data = await self.storage.get_queue_infos(queue_names)
+        return {
+            queue_name: self._convert_to_queue_info(queue_name, infos_data.get(queue_name, {"exists": False}))
+            for queue_name in queue_names
+        }
+    
+    async def list_queues(self) -> List[str]:
+        """List all available queues"""
+        return await self.storage.list_queues()
+    
+    async def health_check(self, queue_name: Optional[str] = None) -> bool:
+        """Check if the queue service is healthy"""
+        return await self.storage.health_check(queue_name)
+    
+    def _convert_to_queue_info(self, queue_name: str, info_data: Dict[str, Any]) -> QueueInfo:
+        """Convert storage queue statistics to QueueInfo model"""
         if not info_data.get("exists", True):
             # Queue doesn't exist - return default info
             return QueueInfo(
@@ -129,53 +184,36 @@ class QueueService:
             last_modified=last_modified
         )
     
-    async def list_queues(self) -> List[str]:
-        """List all available queues"""
-        return await self.storage.list_queues()
-    
-    async def health_check(self, queue_name: Optional[str] = None) -> bool:
-        """Check if the queue service is healthy"""
-        return await self.storage.health_check(queue_name)
+    def _convert_to_wire_message(self, msg_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert storage message data to a JSON-ready dict with the QueueMessage fields"""
+        return {
+            "id": msg_data.get("message_id") or msg_data.get("id"),
+            "message_body": msg_data.get("message_body", {}),
+            "timestamp": self._format_datetime(msg_data.get("timestamp")),
+            "status": _WIRE_STATUSES.get(msg_data.get("status"), _AVAILABLE_VALUE),
+            "visibility_timeout": self._format_datetime(
+                msg_data.get("visibility_timeout_until") or msg_data.get("visibility_timeout")
+            ),
+            "receipt_handle": msg_data.get("receipt_handle"),
+            "receive_count": msg_data.get("receive_count", 0)
+        }
     
-    def _convert_to_queue_message(self, msg_data: Dict[str, Any]) -> QueueMessage:
-        """Convert storage message data to QueueMessage model"""
-        # Handle timestamp conversion
-        timestamp = self._parse_datetime(msg_data.get("timestamp"))
-        
-        # Handle visibility timeout
-        visibility_timeout = None
-        if msg_data.get("visibility_timeout_until"):
-            visibility_timeout = self._parse_datetime(msg_data["visibility_timeout_until"])
-        elif msg_data.get("visibility_timeout"):
-            visibility_timeout = self._parse_datetime(msg_data["visibility_timeout"])
-        
-        # Handle message status
-        status = MessageStatus.AVAILABLE
-        if msg_data.get("status") == "in_flight":
-            status = MessageStatus.IN_FLIGHT
-        elif msg_data.get("status") == "processed":
-            status = MessageStatus.PROCESSED
-        
-        return QueueMessage(
-            id=msg_data.get("message_id") or msg_data.get("id"),
-            message_body=msg_data.get("message_body", {}),
-            timestamp=timestamp,
-            status=status,
-            visibility_timeout=visibility_timeout,
-            receipt_handle=msg_data.get("receipt_handle"),
-            receive_count=msg_data.get("receive_count", 0),
-            attributes=msg_data.get("attributes", {})
-        )
+    def _format_datetime(self, dt_value: Any) -> Any:
+        """Render epoch-second timestamps from storage as ISO strings, leaving other values as they are"""
+        if isinstance(dt_value, (int, float)):
+            return datetime.fromtimestamp(dt_value, tz=timezone.utc).isoformat()
+        return dt_value
     
     def _parse_datetime(self, dt_value: Any) -> datetime:
         """Parse datetime from various formats"""
         if isinstance(dt_value, datetime):
             return dt_value
+        elif isinstance(dt_value, (int, float)):
+            # Epoch seconds, as the JSON backend stores them
+            return datetime.fromtimestamp(dt_value, tz=timezone.utc)
         elif isinstance(dt_value, str):
             try:
-                # Handle ISO format with or without timezone
-                if dt_value.endswith('Z'):
-                    dt_value = dt_value.replace('Z', '+00:00')
+                # ISO format with or without timezone; since Python 3.11 this accepts a "Z" suffix too
                 return datetime.fromisoformat(dt_value)
             except ValueError:
                 # Fallback to current time if parsing fails
@@ -1,11 +1,14 @@
 import os
+from contextlib import asynccontextmanager
+import orjson
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from app.api.routes import router
+from app.api.routes import queue_router, auth_router, router
+from app.api.serialization import ORJSONResponse
 from app.core.config import settings
-from app.services.queue_service import initialize_queue_service, get_queue_service
+from app.services.queue_service import initialize_queue_service, get_queue_service, StorageError
 import logging
 
 # Load environment variables
@@ -19,18 +22,9 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-# Create FastAPI app
-app = FastAPI(
-    title="PyQueue Server",
-    description="A FastAPI-based queue server with configurable storage backends (JSON/SQLite)",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc"
-)
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize the application on startup"""
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the queue service on startup and close it on shutdown"""
     logger.info(f"Starting PyQueue Server with {settings.STORAGE_BACKEND} storage backend")
     
     try:
@@ -38,8 +32,11 @@ async def startup_event():
         await initialize_queue_service()
         logger.info("Queue service initialized successfully")
         
-        # Test storage backend health
+        # Bind the service to the app so routes resolve it via dependency injection
         queue_service = get_queue_service()
+        app.state.queue_service = queue_service
+        
+        # Test storage backend health
         is_healthy = await queue_service.health_check()
         if is_healthy:
             logger.info("Storage backend health check passed")
@@ -49,11 +46,33 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to initialize queue service: {e}")
         raise
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on application shutdown"""
+    
+    yield
+    
     logger.info("PyQueue Server shutting down")
+    await queue_service.close()
+
+# Create FastAPI app
+app = FastAPI(
+    title="PyQueue Server",
+    description="A FastAPI-based queue server with configurable storage backends (JSON/SQLite)",
+    version="1.0.0",
+    docs_url="/docs",
+    redoc_url="/redoc",
+    lifespan=lifespan
+)
+
+@app.exception_handler(StorageError)
+async def storage_error_handler(request: Request, exc: StorageError):
+    """Map storage backend failures to 503 Service Unavailable"""
+    logger.error("Storage error on %s %s: %s", request.method, request.url.path, exc)
+    return ORJSONResponse(status_code=503, content={"detail": "Storage backend unavailable"})
+
+@app.exception_handler(Exception)
+async def unhandled_error_handler(request: Request, exc: Exception):
+    """Log unexpected errors once and return a generic 500 without leaking details"""
+    logger.error("Unhandled error on %s %s: %r", request.method, request.url.path, exc)
+    return ORJSONResponse(status_code=500, content={"detail": "Internal server error"})
 
 # Add CORS middleware
 app.add_middleware(
@@ -65,28 +84,39 @@ app.add_middleware(
 )
 
 # Include API routes
-app.include_router(router, prefix="/api/v1")
+app.include_router(queue_router, prefix=settings.API_V1_PREFIX)
+app.include_router(router, prefix=settings.API_V1_PREFIX)
+app.include_router(auth_router, prefix=settings.API_V1_PREFIX)
 
-@app.get("/")
+# Static payloads for the unauthenticated endpoints, serialized once at import
+_ROOT_BODY = orjson.dumps({
+    "message": "PyQueue Server",
+    "version": "1.0.0",
+    "docs": "/docs",
+    "health": f"{settings.API_V1_PREFIX}/health",
+    "storage_backend": settings.STORAGE_BACKEND,
+    "security": {
+        "authentication": "API Key required",
+        "auth_header": "X-API-Key",
+        "user_info": f"{settings.API_V1_PREFIX}/auth/me",
+        "permissions": f"{settings.API_V1_PREFIX}/auth/permissions/{{queue_name}}"
+    }
+})
+_HEALTH_BODY = orjson.dumps({"status": "healthy", "service": "pyqueue-server"})
+
+@app.get("/", response_class=ORJSONResponse)
 async def root():
     """Root endpoint with basic server information"""
-    return {
-        "message": "PyQueue Server",
-        "version": "1.0.0",        "docs": "/docs",
-        "health": "/api/v1/health",
-        "storage_backend": settings.STORAGE_BACKEND,
-        "security": {
-            "authentication": "API Key required",
-            "auth_header": "X-API-Key",
-            "user_info": "/api/v1/auth/me",
-            "permissions": "/api/v1/auth/permissions/{queue_name}"
-        }
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
+
+HEALTH_ETAG = '"pyqueue-healthy"'
 
-@app.get("/health")
-async def health_check():
+@app.get("/health", response_class=ORJSONResponse)
+async def health_check(request: Request):
     """Global health check endpoint"""
-    return {"status": "healthy", "service": "pyqueue-server"}
+    if request.headers.get("if-none-match") == HEALTH_ETAG:
+        return Response(status_code=304, headers={"ETag": HEALTH_ETAG})
+    return Response(content=_HEALTH_BODY, media_type="application/json", headers={"ETag": HEALTH_ETAG})
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -94,5 +124,11 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
-        log_level=settings.LOG_LEVEL.lower()
+        log_level=settings.LOG_LEVEL.lower(),
+        workers=settings.WORKERS,
+        loop="uvloop",
+        http="httptools",
+        timeout_keep_alive=settings.TIMEOUT_KEEP_ALIVE,
+        backlog=settings.BACKLOG,
+        limit_concurrency=settings.LIMIT_CONCURRENCY
     )
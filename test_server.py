@@ -3,13 +3,17 @@ Simple test script for PyQueue Server
 """
 import asyncio
 import os
+import sys
 import httpx
-import json
+import orjson
 from datetime import datetime
-from dotenv import load_dotenv
+from typing import List
 
-# Load environment variables
-load_dotenv()
+# Load environment variables when run as a script; a runner importing this
+# module is expected to have loaded .env already
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
 HOST = os.getenv("HOST", "localhost")
 PORT = os.getenv("PORT", "8000")
 BASE_URL = f"http://{HOST}:{PORT}"
@@ -17,82 +21,139 @@ BASE_URL = f"http://{HOST}:{PORT}"
 QUEUE_NAME = os.getenv("QUEUE_NAME_TEST", "test_queue")  # Development queue name
 API_KEY = os.getenv("API_KEY_TEST", "pk_dev_12345")  # Development API key
 
-async def test_server():
-    """Test the PyQueue server functionality"""
-    async with httpx.AsyncClient() as client:
-        print("🧪 Testing PyQueue Server")
-        print("=" * 50)
-        
-        # Headers with API key
-        headers = {"X-API-Key": API_KEY}
-        
-        # Test health check
-        print("1. Health Check...")
-        response = await client.get(f"{BASE_URL}/health")
-        print(f"   Status: {response.status_code}")
-        print(f"   Response: {response.json()}")        # Test adding a message
-        print("\n2. Adding Message...")
-        message_data = {
-            "message_body": {
-                "content": "Hello, PyQueue!",
-                "timestamp": datetime.now().isoformat(),
-                "type": "test"
-            }
-        }
-        response = await client.post(
-            f"{BASE_URL}/api/v1/queues/{QUEUE_NAME}/messages",
-            json=message_data,
-            headers=headers
-        )
-        print(f"   Status: {response.status_code}")
-        print(f"   Response: {response.json()}")
-          # Test getting messages
-        print("\n3. Getting Messages...")
-        response = await client.get(f"{BASE_URL}/api/v1/queues/{QUEUE_NAME}/messages", headers=headers)
-        print(f"   Status: {response.status_code}")
-        messages = response.json()
-        print(f"   Found {messages['count']} messages")
-          # Test receiving messages (SQS-style)
-        print("\n4. Receiving Messages (SQS-style)...")
-        response = await client.post(
-            f"{BASE_URL}/api/v1/queues/{QUEUE_NAME}/messages/receive?max_messages=5&visibility_timeout=30",
-            headers=headers
+# (API key, queue name) pairs to run the flow for, all over the same client;
+# API_KEYS_TEST/QUEUE_NAMES_TEST take comma-separated lists, paired in order; a
+# single entry on either side is used with every entry of the other
+_TEST_KEYS = os.getenv("API_KEYS_TEST", API_KEY).split(",")
+_TEST_QUEUES = os.getenv("QUEUE_NAMES_TEST", QUEUE_NAME).split(",")
+if len(_TEST_KEYS) == 1:
+    _TEST_KEYS *= len(_TEST_QUEUES)
+elif len(_TEST_QUEUES) == 1:
+    _TEST_QUEUES *= len(_TEST_KEYS)
+TEST_CONFIGS = list(zip(_TEST_KEYS, _TEST_QUEUES, strict=True))
+
+def rjson(response: httpx.Response):
+    """Decode a JSON response body with orjson"""
+    return orjson.loads(response.content)
+
+async def run_flow(client: httpx.AsyncClient, api_key: str, queue_name: str, message_data: bytes) -> List[str]:
+    """Run the full test flow against one queue as one API key, posting the pre-serialized message_data"""
+    out: List[str] = []
+    log = out.append
+    log(f"🧪 Testing PyQueue Server ({queue_name})")
+    log("=" * 50)
+    
+    # API key set once on the client for this flow rather than passed with every request
+    client.headers["X-API-Key"] = api_key
+    
+    # Independent steps share a round trip: health check alongside the add, and the
+    # message listing alongside the queue listing. Receive and queue info stay in
+    # order, since the listing shows only available messages and info counts in-flight ones
+    health_task = asyncio.create_task(client.get("/health"))
+    add_response = await client.post(
+        f"/api/v1/queues/{queue_name}/messages",
+        content=message_data,
+        headers={"content-type": "application/json"}
+    )
+    health_response = await health_task
+    
+    # Test health check
+    log("1. Health Check...")
+    log(f"   Status: {health_response.status_code}")
+    log(f"   Response: {rjson(health_response)}")
+    
+    # Test adding a message
+    log("\n2. Adding Message...")
+    log(f"   Status: {add_response.status_code}")
+    log(f"   Response: {rjson(add_response)}")
+    
+    messages_response, queues_response = await asyncio.gather(
+        client.get(f"/api/v1/queues/{queue_name}/messages"),
+        client.get("/api/v1/queues")
+    )
+    
+    # Test getting messages
+    log("\n3. Getting Messages...")
+    log(f"   Status: {messages_response.status_code}")
+    messages = rjson(messages_response)
+    log(f"   Found {messages['count']} messages")
+    
+    # Test receiving messages (SQS-style)
+    log("\n4. Receiving Messages (SQS-style)...")
+    response = await client.post(
+        f"/api/v1/queues/{queue_name}/messages/receive?max_messages=5&visibility_timeout=30"
+    )
+    log(f"   Status: {response.status_code}")
+    received_messages = rjson(response)
+    log(f"   Received {received_messages['count']} messages")
+    
+    # Test queue info
+    log("\n5. Queue Information...")
+    response = await client.get(f"/api/v1/queues/{queue_name}/info")
+    log(f"   Status: {response.status_code}")
+    queue_info = rjson(response)
+    log(f"   Queue: {queue_info['queue_name']}")
+    log(f"   Total Messages: {queue_info['message_count']}")
+    log(f"   Available: {queue_info['available_messages']}")
+    log(f"   In Flight: {queue_info['in_flight_messages']}")
+    
+    # Test listing queues
+    log("\n6. Listing All Queues...")
+    log(f"   Status: {queues_response.status_code}")
+    queues = rjson(queues_response)
+    log(f"   Found {queues['count']} queues: {queues['queues']}")
+    
+    # Test getting a specific message by ID (if any messages exist)
+    if messages['count'] > 0:
+        test_message_id = messages['messages'][0]['id']
+        log(f"\n7. Getting Message by ID: {test_message_id}...")
+        response = await client.get(
+            f"/api/v1/queues/{queue_name}/message/{test_message_id}"
         )
-        print(f"   Status: {response.status_code}")
-        received_messages = response.json()
-        print(f"   Received {received_messages['count']} messages")
-          # Test queue info
-        print("\n5. Queue Information...")
-        response = await client.get(f"{BASE_URL}/api/v1/queues/{QUEUE_NAME}/info", headers=headers)
-        print(f"   Status: {response.status_code}")
-        queue_info = response.json()
-        print(f"   Queue: {queue_info['queue_name']}")
-        print(f"   Total Messages: {queue_info['message_count']}")
-        print(f"   Available: {queue_info['available_messages']}")
-        print(f"   In Flight: {queue_info['in_flight_messages']}")
-          # Test listing queues
-        print("\n6. Listing All Queues...")
-        response = await client.get(f"{BASE_URL}/api/v1/queues", headers=headers)
-        print(f"   Status: {response.status_code}")
-        queues = response.json()
-        print(f"   Found {queues['count']} queues: {queues['queues']}")
-        
-        # Test getting a specific message by ID (if any messages exist)
-        if messages['count'] > 0:
-            test_message_id = messages['messages'][0]['id']
-            print(f"\n7. Getting Message by ID: {test_message_id}...")
-            response = await client.get(
-                f"{BASE_URL}/api/v1/queues/{QUEUE_NAME}/message/{test_message_id}",
-                headers=headers
-            )
-            print(f"   Status: {response.status_code}")
-            message_by_id = response.json()
-            print(f"   Message ID: {message_by_id.get('id')}")
-            print(f"   Message Body: {message_by_id.get('message_body')}")
-        else:
-            print("\n7. No messages available to test get_message_by_id.")
+        log(f"   Status: {response.status_code}")
+        message_by_id = rjson(response)
+        log(f"   Message ID: {message_by_id.get('id')}")
+        log(f"   Message Body: {message_by_id.get('message_body')}")
+    else:
+        log("\n7. No messages available to test get_message_by_id.")
+    
+    # A drained queue is the one a poller re-checks most, so its ETag must hold still
+    log("\n8. Queue Info ETag on a Drained Queue...")
+    response = await client.delete(f"/api/v1/queues/{queue_name}/messages")
+    log(f"   Clear Status: {response.status_code}")
+    first, second = [
+        (await client.get(f"/api/v1/queues/{queue_name}/info")).headers.get("etag")
+        for _ in range(2)
+    ]
+    log(f"   {'✅' if first and first == second else '❌'} ETag: {first} then {second}")
+    response = await client.get(f"/api/v1/queues/{queue_name}/info", headers={"If-None-Match": first or ""})
+    log(f"   Conditional GET Status: {response.status_code}")
+    
+    return out
 
+async def test_server():
+    """Test the PyQueue server functionality for every configured key/queue pair"""
+    # Timestamp taken once per run, so the message body is built and serialized once
+    now_iso = datetime.now().isoformat()
+    message_data = orjson.dumps({
+        "message_body": {
+            "content": "Hello, PyQueue!",
+            "timestamp": now_iso,
+            "type": "test"
+        }
+    })
+    
+    async with httpx.AsyncClient(base_url=BASE_URL, headers={"accept-encoding": "identity"}) as client:
+        for api_key, queue_name in TEST_CONFIGS:
+            # Each flow's output is written in one go once it finishes, not line by line between requests
+            out = await run_flow(client, api_key, queue_name, message_data)
+            sys.stdout.write("\n".join(out) + "\n")
         print("\n✅ All tests completed!")
       
 if __name__ == "__main__":
-    asyncio.run(test_server())
+    # Same loop the server runs on; uvloop comes with uvicorn[standard]
+    try:
+        from uvloop import run
+    except ImportError:
+        from asyncio import run
+    run(test_server())